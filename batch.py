@@ -0,0 +1,171 @@
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from engine import Engine, _Board, _get_rules, _reachable_states
+
+'''
+Batch Overview
+
+Scores many positions at once with NumPy, for analysis and training data (every reachable state, or every position of many self-play games),
+where calling Engine._check_terminal_state one board at a time is too slow. NumPy is only needed by this module, the game itself doesn't use it.
+
+A batch is an (M, N, N) int8 array: board m, row y, column x holds 1 for X, -1 for O, and 0 for an empty cell.
+The lines of the rules (every K straight cells, in the 4 directions) form a line-sum kernel, an (N * N, L) matrix with a 1 where the cell belongs to the line:
+multiplying the cells of one player by the kernel gives, for every board and every line, how many cells of the line the player holds, and the line is won when that is K.
+The batch is processed in slices of batch_size boards, so that the (M, L) line sums of a huge batch never have to fit in memory at once.
+
+The results match the scalar functions: terminal flags and winners (1 X, -1 O, 0 draw or not ended) as Engine._check_terminal_state, X checked before O,
+and the player to move (1 X, -1 O) as Engine._player.
+
+Usage:
+    evaluator = BatchEvaluator(grid_length = 3, win_length = 3)
+    boards = to_boards(states)
+    terminal, winners, players = evaluator.evaluate(boards, first_player = "X")
+    moves = evaluator.legal_moves(boards)
+
+'''
+
+#converting the player name used by the engine to the cell value of the batch, and back
+_player_values = {"X": 1, "O": -1}
+_player_names = {1: "X", -1: "O"}
+
+class BatchEvaluator:
+    _default_batch_size = 65536
+
+    def __init__(self, grid_length = 3, win_length = 3, batch_size = _default_batch_size):
+        self.rules = _get_rules(grid_length, win_length)
+        self._batch_size = batch_size
+
+        #float32 so that the product runs on the BLAS routines, the sums (at most K) are exact
+        cell_count = self.rules.cell_count
+        self._kernel = np.zeros((cell_count, len(self.rules.win_masks)), dtype = np.float32)
+        for line, mask in enumerate(self.rules.win_masks):
+            for index in range(cell_count):
+                if mask >> index & 1:
+                    self._kernel[index, line] = 1
+
+    #terminal flags (bool), winners (int8: 1 X, -1 O, 0 draw or not ended) and players to move (int8: 1 X, -1 O) of every board of the batch.
+    #first_player: "X" or "O" for the whole batch, or an array with 1 or -1 for every board, deciding the player to move when both have as many cells
+    def evaluate(self, boards, first_player = "X"):
+        flat = self._flatten(boards)
+        count = len(flat)
+
+        terminal = np.empty(count, dtype = bool)
+        winners = np.zeros(count, dtype = np.int8)
+
+        for start in range(0, count, self._batch_size):
+            chunk = flat[start:start + self._batch_size]
+            x_wins = self._wins(chunk == 1)
+            o_wins = self._wins(chunk == -1) & ~x_wins
+
+            winners[start:start + len(chunk)] = np.where(x_wins, 1, np.where(o_wins, -1, 0))
+            terminal[start:start + len(chunk)] = x_wins | o_wins | (chunk != 0).all(axis = 1)
+
+        return (terminal, winners, self._players(flat, first_player))
+
+    #mask (M, N, N) of the cells the player to move can take: the empty cells of the boards that haven't ended, like Engine.legal_moves
+    def legal_moves(self, boards):
+        terminal = self.evaluate(boards)[0]
+        return (np.asarray(boards) == 0) & ~terminal[:, None, None]
+
+    def _flatten(self, boards):
+        boards = np.asarray(boards, dtype = np.int8)
+        length = self.rules.length
+
+        if boards.ndim != 3 or boards.shape[1:] != (length, length):
+            raise ValueError(f"boards must be an (M, {length}, {length}) array, got shape {boards.shape}")
+
+        return boards.reshape(len(boards), length * length)
+
+    #whether each board has a line fully held by the player whose cells are given (bool array (M, N * N))
+    def _wins(self, cells):
+        sums = cells.astype(np.float32) @ self._kernel
+        return (sums == self.rules.win_length).any(axis = 1)
+
+    #the player with fewer cells moves, the first player when both have as many
+    def _players(self, flat, first_player):
+        balance = (flat == 1).sum(axis = 1, dtype = np.int32) - (flat == -1).sum(axis = 1, dtype = np.int32)
+
+        if isinstance(first_player, str):
+            first_player = _player_values[first_player]
+
+        first_player = np.broadcast_to(np.asarray(first_player, dtype = np.int8), balance.shape)
+        return np.where(balance > 0, -1, np.where(balance < 0, 1, first_player)).astype(np.int8)
+
+#(M, N, N) batch of the given engine states
+def to_boards(states):
+    states = list(states)
+    length = states[0].rules.length if states else 3
+    cell_count = length * length
+    boards = np.zeros((len(states), cell_count), dtype = np.int8)
+
+    for row, state in enumerate(states):
+        for index in range(cell_count):
+            if state.x_bits >> index & 1:
+                boards[row, index] = 1
+            elif state.o_bits >> index & 1:
+                boards[row, index] = -1
+
+    return boards.reshape(len(states), length, length)
+
+#checking the batch evaluator against Engine._check_terminal_state, Engine._player and Engine.legal_moves:
+#every reachable state of the 3x3 grid, and random positions of bigger grids (which need not be reachable)
+def verify_batch_evaluator(random_positions = 20000, seed = 0):
+    failures = 0
+    cases = [((3, 3), [(state, player) for state, player in _reachable_states()])]
+
+    generator = random.Random(seed)
+    for length, win_length in ((4, 3), (5, 4), (7, 5)):
+        rules = _get_rules(length, win_length)
+        positions = []
+        for _ in range(random_positions):
+            state = _Board(rules = rules)
+            for index in generator.sample(range(rules.cell_count), generator.randint(0, rules.cell_count)):
+                if generator.random() < 0.5:
+                    state.x_bits |= 1 << index
+                else:
+                    state.o_bits |= 1 << index
+            positions.append((state, generator.choice("XO")))
+        cases.append(((length, win_length), positions))
+
+    for (length, win_length), positions in cases:
+        evaluator = BatchEvaluator(length, win_length)
+        states = [state for state, _ in positions]
+        first_players = np.array([_player_values[player] for _, player in positions], dtype = np.int8)
+        boards = to_boards(states)
+
+        start = time.perf_counter()
+        terminal, winners, players = evaluator.evaluate(boards, first_players)
+        moves = evaluator.legal_moves(boards)
+        batch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for row, (state, player) in enumerate(positions):
+            is_terminal, score = Engine._check_terminal_state(state)
+            to_move = Engine._player(state, player)
+            legal = 0 if is_terminal else (state.rules.full_mask ^ (state.x_bits | state.o_bits))
+            batch_legal = sum(1 << index for index in np.flatnonzero(moves[row]))
+
+            if (is_terminal != terminal[row] or (score or 0) != winners[row] or to_move != _player_names[int(players[row])] or legal != batch_legal):
+                failures += 1
+        scalar_seconds = time.perf_counter() - start
+
+        print(f"{length}x{length} win {win_length}: {len(positions)} positions, batch {batch_seconds:.3f} s, scalar checks {scalar_seconds:.3f} s")
+
+    print(f"{failures} failures")
+    return failures == 0
+
+def main():
+    parser = argparse.ArgumentParser(description = "Batch evaluation of positions with NumPy")
+    parser.add_argument("--verify", action = "store_true", help = "check the batch evaluator against the scalar functions")
+    args = parser.parse_args()
+
+    if args.verify and not verify_batch_evaluator():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
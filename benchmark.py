@@ -0,0 +1,273 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from engine import Engine, SearchStats, _Board, _TranspositionTable, _move_orderings
+
+'''
+Benchmark Overview
+
+Measures the search hot path over a fixed corpus of 3x3 positions: the empty grid, every opening of 1 and 2 moves, and a few tactical positions
+(a win to take, a loss to block, forks to make or to defuse).
+
+Each backend (a search mode, with or without the transposition table) decides the move of every position of the corpus from a cold start,
+and reports the nodes searched, the nodes per second, the wall time per move, the peak memory allocated while searching (tracemalloc),
+and the garbage collections run during the timed searches along with the time they paused the search.
+The helpers called at every node (terminal check, action generation, copy) are timed on their own, in nanoseconds per call.
+
+The results are written as JSON, so that a run can be compared against a previous one (another engine backend, or the same one before a change):
+every time, node count or memory that grew by more than the threshold is reported as a regression, unless it grew by less than the noise floor of its metric
+(sub-millisecond times move by more than 10% from one run to the next on identical code).
+
+Usage:
+    python benchmark.py --output before.json
+    (change the engine)
+    python benchmark.py --output after.json --compare before.json --threshold 0.1
+
+'''
+
+#tactical positions, rows separated by "/", X moving first. the comment tells what the player to move has to find
+_tactical_positions = {
+    "win in one": "XX./OO./...",        #X completes the top row
+    "block": "X../OO./X..",             #X has to block the middle row
+    "make fork": "X../.O./..X",         #O has to take an edge, a corner loses to the fork
+    "opposite corner": "X../.O./...",   #X after a corner opening answered by the center
+    "edge opening": ".X./.O./...",      #X after an edge opening answered by the center
+    "late game": "XOX/XOO/.X.",         #O with two cells left
+}
+
+#every backend searches from a cold start: a new move ordering and, when it uses one, a new transposition table for every position
+def _backends():
+    backends = {"minimax": lambda state, player, counter: (Engine._max_value if player == "X" else Engine._min_value)(state, None, counter),
+                "minimax+table": lambda state, player, counter: (Engine._max_value if player == "X" else Engine._min_value)(state, _TranspositionTable(Engine._transposition_table_size), counter)}
+
+    for name, ordering in _move_orderings.items():
+        backends[f"alpha-beta {name}"] = _alpha_beta_backend(ordering, False)
+        backends[f"alpha-beta {name}+table"] = _alpha_beta_backend(ordering, True)
+
+    return backends
+
+def _alpha_beta_backend(ordering, with_table):
+    def search(state, player, counter):
+        table = _TranspositionTable(Engine._transposition_table_size) if with_table else None
+        search_function = Engine._alpha_beta_max if player == "X" else Engine._alpha_beta_min
+        return search_function(state, float("-inf"), float("inf"), ordering(), table, counter)
+
+    return search
+
+def _parse_position(rows):
+    state = _Board()
+    for y, row in enumerate(rows.split("/")):
+        for x, cell in enumerate(row):
+            if cell != ".":
+                state.place(x, y, cell)
+    return state
+
+#(name, state, player to move) of every position of the corpus
+def corpus():
+    positions = [("empty", _Board(), "X")]
+    frontier = [("", _Board())]
+
+    for _ in range(2):
+        next_frontier = []
+        for name, state in frontier:
+            player = Engine._player(state, "X")
+            for action in Engine._get_actions(state):
+                projected_state = state.copy()
+                projected_state.place(action.x, action.y, player)
+                projected_name = f"{name} {player}{action.y * 3 + action.x}".strip()
+                positions.append((projected_name, projected_state, Engine._player(projected_state, "X")))
+                next_frontier.append((projected_name, projected_state))
+        frontier = next_frontier
+
+    for name, rows in _tactical_positions.items():
+        state = _parse_position(rows)
+        positions.append((name, state, Engine._player(state, "X")))
+
+    return positions
+
+#best of repeat runs of the whole corpus for the time of every position, without statistics so that the measured search is the one the game runs.
+#the backends take turns, so that a slow spell of the machine spoils one run of each rather than every run of one backend.
+#returns {name: (seconds of every position, _CollectionTimer of the timed runs)}
+def _time_backends(backends, positions, repeat):
+    timings = {name: ([float("inf")] * len(positions), _CollectionTimer()) for name in backends}
+
+    gc.collect()
+    for _ in range(repeat):
+        for name, search in backends.items():
+            move_seconds, collector = timings[name]
+            gc.callbacks.append(collector)
+            try:
+                for index, (_, state, player) in enumerate(positions):
+                    start = time.perf_counter()
+                    search(state.copy(), player, None)
+                    move_seconds[index] = min(move_seconds[index], time.perf_counter() - start)
+            finally:
+                gc.callbacks.remove(collector)
+
+    return timings
+
+#the metrics of a backend from its timings, then one run counting the nodes, and one more under tracemalloc for the memory (tracemalloc slows every allocation down)
+def _run_backend(search, positions, repeat, move_seconds, collector):
+    nodes = 0
+    for _, state, player in positions:
+        stats = SearchStats()
+        search(state.copy(), player, stats)
+        nodes += stats.nodes
+
+    tracemalloc.start()
+    for _, state, player in positions:
+        search(state.copy(), player, None)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = sum(move_seconds)
+    return {"nodes": nodes,
+            "seconds": seconds,
+            "nodes_per_second": nodes / seconds if seconds else 0.0,
+            "mean_move_ms": seconds / len(positions) * 1000,
+            "max_move_ms": max(move_seconds) * 1000,
+            "peak_kb": peak / 1024,
+            "gc_collections": collector.collections / repeat,
+            "gc_pause_ms": collector.seconds / repeat * 1000}
+
+#garbage collector callback counting the collections and the time they take
+class _CollectionTimer:
+    def __init__(self):
+        self.collections = 0
+        self.seconds = 0.0
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.collections += 1
+            self.seconds += time.perf_counter() - self._start
+            self._start = None
+
+#nanoseconds per call of the helpers called at every node of the search, over the states of the corpus
+def _run_functions(positions, repeat):
+    states = [state for _, state, _ in positions]
+    functions = {"_check_terminal_state": Engine._check_terminal_state,
+                 "_check_classic_terminal_state": Engine._check_classic_terminal_state,
+                 "_get_actions": Engine._get_actions,
+                 "_Board.copy": _Board.copy,
+                 "_canonicalize": Engine._canonicalize}
+    loops = 20
+    best = dict.fromkeys(functions, float("inf"))
+
+    #short samples taken in turn from every helper, so that a slow spell of the machine spoils one sample of each rather than every sample of one helper
+    for _ in range(repeat * 10):
+        for name, function in functions.items():
+            start = time.perf_counter()
+            for _ in range(loops):
+                for state in states:
+                    function(state)
+            best[name] = min(best[name], time.perf_counter() - start)
+
+    return {name: seconds / (loops * len(states)) * 1e9 for name, seconds in best.items()}
+
+def run_benchmark(backend_names = None, repeat = 5):
+    positions = corpus()
+    backends = _backends()
+    backend_names = backend_names or list(backends)
+
+    for name in backend_names:
+        if name not in backends:
+            raise ValueError(f"unknown backend {name!r}, expected one of {', '.join(backends)}")
+
+    timings = _time_backends({name: backends[name] for name in backend_names}, positions, repeat)
+    results = {name: _run_backend(backends[name], positions, repeat, *timings[name]) for name in backend_names}
+
+    return {"python": platform.python_version(),
+            "positions": len(positions),
+            "backends": results,
+            "functions_ns": _run_functions(positions, repeat)}
+
+#metrics where a bigger value is worse. nodes_per_second follows seconds, so it isn't checked on its own
+_checked_metrics = ("nodes", "seconds", "max_move_ms", "peak_kb", "gc_collections")
+
+#smallest absolute growth of each metric reported as a regression, below which the difference is timer and scheduling noise ("ns": the helpers of _run_functions)
+_noise_floors = {"nodes": 0, "seconds": 0.01, "max_move_ms": 1.0, "peak_kb": 4.0, "gc_collections": 1, "ns": 50}
+
+def _is_regression(metric, before, after, threshold):
+    return after > before * (1 + threshold) and after - before > _noise_floors[metric]
+
+#every metric of the current results that grew by more than threshold (0.1 = 10%) and its noise floor over the baseline, as (name, metric, baseline, current)
+def find_regressions(baseline, current, threshold):
+    regressions = []
+
+    for name, metrics in current["backends"].items():
+        if name not in baseline["backends"]:
+            continue
+        for metric in _checked_metrics:
+            before = baseline["backends"][name].get(metric)
+            after = metrics[metric]
+            if before is None:
+                continue
+            if _is_regression(metric, before, after, threshold):
+                regressions.append((name, metric, before, after))
+
+    for name, after in current["functions_ns"].items():
+        before = baseline["functions_ns"].get(name)
+        if before is not None and _is_regression("ns", before, after, threshold):
+            regressions.append((name, "ns", before, after))
+
+    return regressions
+
+def _print_results(results):
+    print(f"{results['positions']} positions, python {results['python']}")
+    print(f"{'backend':<28}{'nodes':>10}{'nodes/s':>12}{'seconds':>10}{'mean ms':>10}{'max ms':>10}{'peak KB':>10}{'gc':>6}{'gc ms':>8}")
+    for name, metrics in results["backends"].items():
+        print(f"{name:<28}{metrics['nodes']:>10}{metrics['nodes_per_second']:>12.0f}{metrics['seconds']:>10.3f}"
+              f"{metrics['mean_move_ms']:>10.3f}{metrics['max_move_ms']:>10.3f}{metrics['peak_kb']:>10.1f}"
+              f"{metrics['gc_collections']:>6.0f}{metrics['gc_pause_ms']:>8.2f}")
+
+    print()
+    print(f"{'function':<32}{'ns/call':>10}")
+    for name, nanoseconds in results["functions_ns"].items():
+        print(f"{name:<32}{nanoseconds:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark of the search over a fixed corpus of positions")
+    parser.add_argument("--backends", nargs = "+", default = None, help = "backends to run, all of them by default")
+    parser.add_argument("--repeat", type = int, default = 5, help = "runs of the corpus, the fastest one is kept")
+    parser.add_argument("--output", default = None, help = "JSON file receiving the results")
+    parser.add_argument("--compare", default = None, help = "JSON results of a previous run to check for regressions")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "relative growth reported as a regression")
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark(args.backends, args.repeat)
+    except ValueError as error:
+        parser.error(str(error))
+
+    _print_results(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent = 2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+        regressions = find_regressions(baseline, results, args.threshold)
+
+        print()
+        for name, metric, before, after in regressions:
+            #a metric growing from 0 (e.g. gc_collections) has no relative change, only the absolute one
+            change = f"{after / before - 1:+.1%}" if before else f"{after - before:+.3f}"
+            print(f"regression: {name} {metric} {before:.3f} -> {after:.3f} ({change})")
+        print(f"{len(regressions)} regressions over {args.threshold:.0%} against {args.compare}")
+
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
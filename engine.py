@@ -0,0 +1,2028 @@
+import random
+import sys
+import argparse
+import time
+import os
+import mmap
+import struct
+import zlib
+from collections import OrderedDict
+
+'''
+Engine Overview
+
+Game logic of tic tac toe, independent of any user interface (the module doesn't import tkinter), so that it can be used from the GUI, scripts, or services alike.
+The game state holds one bitmask of the occupied cells for each player (X and O) on a grid of any size, where a given amount of straight cells wins.
+Engine keeps the state of one game and decides the moves of the computer: on the classic 3x3 grid by solving the game with minimax (or reading the solution table),
+on bigger grids with a depth-limited search bounded by a time budget.
+
+Usage:
+    engine = Engine()
+    engine.new_game(first_player = "X")
+    engine.apply(1, 1)
+    action = engine.best_move(difficulty = "Impossible")
+    engine.apply(action.x, action.y)
+    engine.is_terminal(), engine.winner()
+
+Passing a SearchStats to best_move or search collects the statistics of that search (nodes, terminal checks, cache hits, depth, branching, time per root move).
+
+Running the module provides the offline tools: comparing search modes, verifying the symmetric search, building and verifying the solution table, profiling a search.
+
+'''
+
+#"action" refers to what move is done (consisting of indexes of the move in the grid)
+#the search itself works on cell indexes (y * length + x); each rules object creates the action of every cell once, and every search returns those same objects
+class _Action:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+#the 8 symmetries of a grid (identity, 3 rotations, 4 reflections) as functions of the cell coordinate, last being the largest coordinate of the grid
+_symmetry_functions = (lambda x, y, last: (x, y),
+                       lambda x, y, last: (last - y, x),
+                       lambda x, y, last: (last - x, last - y),
+                       lambda x, y, last: (y, last - x),
+                       lambda x, y, last: (last - x, y),
+                       lambda x, y, last: (x, last - y),
+                       lambda x, y, last: (y, x),
+                       lambda x, y, last: (last - y, last - x))
+
+#geometry of a game: a length x length grid where win_length straight cells (horizontally, vertically, or diagonally) win. cell (x, y) has the index y * length + x
+class _Rules:
+    def __init__(self, length, win_length):
+        self.length = length
+        self.win_length = win_length
+        self.cell_count = length * length
+        self.full_mask = (1 << self.cell_count) - 1
+
+        #every straight line of win_length cells, and for each cell the lines passing through it, so that a move only needs its own lines checked
+        directions = ((1, 0), (0, 1), (1, 1), (-1, 1))
+        win_masks = []
+        for dx, dy in directions:
+            for y in range(length):
+                for x in range(length):
+                    end_x = x + dx * (win_length - 1)
+                    end_y = y + dy * (win_length - 1)
+                    if 0 <= end_x < length and 0 <= end_y < length:
+                        win_masks.append(sum(1 << ((y + dy * i) * length + x + dx * i) for i in range(win_length)))
+
+        self.win_masks = tuple(win_masks)
+        self.cell_lines = tuple(tuple(mask for mask in self.win_masks if mask >> index & 1) for index in range(self.cell_count))
+
+        #one shared action per cell, so the search never creates action objects
+        self.actions = tuple(_Action(index % length, index // length) for index in range(self.cell_count))
+
+        #symmetries as permutations of the cell indexes: symmetries[s][index] is the index the cell moves to under the symmetry s
+        self.symmetries = tuple(self._permutation(function) for function in _symmetry_functions)
+        self.inverse_symmetries = tuple(tuple(permutation.index(index) for index in range(self.cell_count)) for permutation in self.symmetries)
+
+        #score of a win in the depth-limited search, bigger than what the evaluation of any state can reach (every line holding win_length - 1 marks)
+        self.win_score = 10 ** win_length * len(self.win_masks)
+
+        #cells from the center outwards, the order the depth-limited search tries its moves in
+        last = length - 1
+        self.center_order = tuple(sorted(range(self.cell_count), key = lambda index: abs(2 * (index % length) - last) + abs(2 * (index // length) - last)))
+
+    def is_classic(self):
+        return self is _classic_rules
+
+    def _permutation(self, function):
+        images = [function(index % self.length, index // self.length, self.length - 1) for index in range(self.cell_count)]
+        return tuple(y * self.length + x for x, y in images)
+
+_rules_cache = {}
+
+#rules are immutable, so every game of the same size shares the same instance
+def _get_rules(length, win_length):
+    key = (length, win_length)
+
+    if key not in _rules_cache:
+        if not 1 <= win_length <= length:
+            raise ValueError(f"win length must be between 1 and {length}, got {win_length}")
+        _rules_cache[key] = _Rules(length, win_length)
+
+    return _rules_cache[key]
+
+_classic_rules = _get_rules(3, 3)
+
+#game state as two bitmasks, one for each player. the bit number y * length + x of a player's mask is set when the player occupies the cell (x, y)
+#moves are applied and undone by setting and clearing bits, which doesn't allocate anything
+class _Board:
+    __slots__ = ("x_bits", "o_bits", "rules")
+
+    def __init__(self, x_bits = 0, o_bits = 0, rules = _classic_rules):
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.rules = rules
+
+    def place(self, x, y, player):
+        if player == "X":
+            self.x_bits |= 1 << (y * self.rules.length + x)
+        else:
+            self.o_bits |= 1 << (y * self.rules.length + x)
+
+    def get(self, x, y):
+        bit = 1 << (y * self.rules.length + x)
+
+        if self.x_bits & bit:
+            return "X"
+        elif self.o_bits & bit:
+            return "O"
+        return None
+
+    def clear(self):
+        self.x_bits = 0
+        self.o_bits = 0
+
+    def copy(self):
+        return _Board(self.x_bits, self.o_bits, self.rules)
+
+#lookup tables of the classic 3x3 grid, computed once when the module is loaded. each table is indexed by a 9-bit mask
+#the exhaustive searches and the solution table only run on this grid, other grids use the depth-limited search
+_board_length = _classic_rules.length
+_cell_count = _classic_rules.cell_count
+_full_mask = _classic_rules.full_mask
+_win_masks = _classic_rules.win_masks
+_win_score = _classic_rules.win_score
+
+#whether a mask contains a straight line, the amount of set bits of a mask, and the cell indexes set in a mask (the legal moves when indexed by the empty cells)
+_line_table = bytes(any(bits & mask == mask for mask in _win_masks) for bits in range(1 << _cell_count))
+_bit_counts = bytes(bin(bits).count("1") for bits in range(1 << _cell_count))
+_cell_moves = tuple(tuple(index for index in range(_cell_count) if bits >> index & 1) for bits in range(1 << _cell_count))
+
+#base 3 value of the cells set in a mask, used to index the solution table
+_ternary_codes = tuple(sum(3 ** index for index in _cell_moves[bits]) for bits in range(1 << _cell_count))
+
+_cell_actions = _classic_rules.actions
+
+_symmetries = _classic_rules.symmetries
+_inverse_symmetries = _classic_rules.inverse_symmetries
+
+#image of every mask under every symmetry
+_symmetry_tables = tuple(tuple(sum(1 << permutation[index] for index in _cell_moves[bits]) for bits in range(1 << _cell_count)) for permutation in _symmetries)
+
+#for every set of symmetries (bit s set when the symmetry s is included, the identity is always included), the mask of cells that are the smallest index of their orbit
+_distinct_cells = tuple(sum(1 << index for index in range(_cell_count)
+                            if all(_symmetries[symmetry][index] >= index for symmetry in range(len(_symmetries)) if stabilizer >> symmetry & 1))
+                        for stabilizer in range(1 << len(_symmetries)))
+
+#position cache shared by the minimax recursion. maps the encoding of a state (plus the side to move) to its already computed (score, action) result
+#the amount of stored positions is bounded, once the bound is reached the least recently used position is evicted to make room for the new one
+class _TranspositionTable:
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        #marking the position as the most recently used one
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last = False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+#state shared by the states of one depth-limited search: the rules, when the time budget runs out, the transposition table,
+#optionally an event that stops the search as soon as it is set (e.g. when the game is restarted while the computer is thinking), and optionally the SearchStats to fill
+class _LimitedSearch:
+    def __init__(self, rules, deadline, table = None, cancel = None, stats = None):
+        self.rules = rules
+        self.deadline = deadline
+        self.table = table
+        self.cancel = cancel
+        self.stats = stats
+        self.nodes = 0
+
+    def is_over(self):
+        return time.perf_counter() >= self.deadline or (self.cancel is not None and self.cancel.is_set())
+
+#raised inside the depth-limited search once its time budget has run out or it has been cancelled
+class _SearchTimeout(Exception):
+    pass
+
+#statistics of one search, filled when given to Engine.search or Engine.best_move (or as the counter of the search functions):
+#states visited, terminal checks, transposition table hits and misses, states visited at each ply (distance from the root state), and time spent under each root move.
+#the searches only touch it behind an "is not None" check, so a search without statistics doesn't pay for them. a stats object holds a single search
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0
+        self.terminal_checks = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.nodes_per_ply = []
+        self.root_move_seconds = {}
+        self.depth = None
+        self.seconds = 0.0
+        self.source = "search"
+
+        self._root_occupied = None
+        self._root_move = None
+        self._root_move_start = None
+        self._start = None
+        self._table = None
+
+    #called before the search, with the transposition table it uses (if any) so that its hits and misses can be attributed to the search
+    def start(self, state, table = None):
+        self._root_occupied = state.x_bits | state.o_bits
+        self._start = time.perf_counter()
+        self._table = table
+
+        if table is not None:
+            self.cache_hits -= table.hits
+            self.cache_misses -= table.misses
+
+    #called by the search for every state it visits. the root is the first state visited when start wasn't called
+    def visit(self, state):
+        occupied = state.x_bits | state.o_bits
+
+        if self._root_occupied is None:
+            self._root_occupied = occupied
+            self._start = time.perf_counter()
+
+        self.nodes += 1
+        ply = bin(occupied).count("1") - bin(self._root_occupied).count("1")
+
+        if ply == len(self.nodes_per_ply):
+            self.nodes_per_ply.append(0)
+        self.nodes_per_ply[ply] += 1
+
+        #a state one move away from the root starts the subtree of that root move, and ends the subtree of the previous one
+        if ply == 1:
+            now = time.perf_counter()
+            self._close_root_move(now)
+            self._root_move = (occupied ^ self._root_occupied).bit_length() - 1
+            self._root_move_start = now
+
+    #called once the search has returned
+    def finish(self):
+        now = time.perf_counter()
+        self._close_root_move(now)
+
+        if self._start is not None:
+            self.seconds = now - self._start
+
+        if self._table is not None:
+            self.cache_hits += self._table.hits
+            self.cache_misses += self._table.misses
+            self._table = None
+
+    def _close_root_move(self, now):
+        if self._root_move is not None:
+            self.root_move_seconds[self._root_move] = self.root_move_seconds.get(self._root_move, 0.0) + now - self._root_move_start
+            self._root_move = None
+
+    #None when the states weren't visited one by one: decisions read from the solution table, and the parallel and Monte Carlo searches, which only count them
+    def max_depth(self):
+        return len(self.nodes_per_ply) - 1 if self.nodes_per_ply else None
+
+    #average amount of children of the states at each ply, estimated from the amount of states visited at that ply and the next
+    def branching_factors(self):
+        return [self.nodes_per_ply[ply + 1] / self.nodes_per_ply[ply] for ply in range(len(self.nodes_per_ply) - 1)]
+
+    def summary(self):
+        return {"source": self.source,
+                "nodes": self.nodes,
+                "terminal_checks": self.terminal_checks,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "max_depth": self.max_depth(),
+                "depth": self.depth,
+                "nodes_per_ply": list(self.nodes_per_ply),
+                "branching_factors": self.branching_factors(),
+                "root_move_seconds": dict(self.root_move_seconds),
+                "seconds": self.seconds}
+
+    def __str__(self):
+        max_depth = self.max_depth()
+        branching_factors = self.branching_factors()
+        lines = [f"{self.source}: {self.nodes} nodes in {self.seconds * 1000:.1f} ms",
+                 f"terminal checks {self.terminal_checks}, cache hits {self.cache_hits} / misses {self.cache_misses}",
+                 f"max depth {'n/a' if max_depth is None else max_depth}" + (f", completed depth {self.depth}" if self.depth is not None else ""),
+                 "branching " + (" ".join(f"{factor:.1f}" for factor in branching_factors) if branching_factors else "n/a")]
+
+        if self.root_move_seconds:
+            lines.append("root moves " + " ".join(f"{move}:{seconds * 1000:.1f}ms" for move, seconds in sorted(self.root_move_seconds.items())))
+
+        return "\n".join(lines)
+
+#move ordering strategies for the alpha-beta search. the ordering decides in which sequence the children of a state are visited:
+#the sooner the best action is visited, the more of its siblings can be pruned. moves are cell indexes (y * 3 + x), natural ordering keeps them row by row
+class _NaturalOrdering:
+    def order(self, moves, ply):
+        return moves
+
+    #invoked when a move causes a cutoff at the given ply (distance from the root state)
+    def record_cutoff(self, move, ply):
+        pass
+
+    def clear(self):
+        pass
+
+#center first, then the corners, then the edges. sorting is stable, so moves of the same rank keep their natural order
+class _PositionalOrdering(_NaturalOrdering):
+    def order(self, moves, ply):
+        return sorted(moves, key = _PositionalOrdering._rank)
+
+    def _rank(move):
+        last = _board_length - 1
+        x = move % _board_length
+        y = move // _board_length
+
+        if x * 2 == last and y * 2 == last:
+            return 0
+        elif x in (0, last) and y in (0, last):
+            return 1
+        return 2
+
+#killer and history heuristic: actions that recently caused a cutoff at the same ply (killers) are tried first,
+#then the rest is sorted by how often (weighted by the remaining depth) they caused a cutoff anywhere in the tree, falling back to the positional rank
+class _HistoryOrdering(_NaturalOrdering):
+    _killers_per_ply = 2
+
+    def __init__(self):
+        self._killers = {}
+        self._history = {}
+
+    def order(self, moves, ply):
+        killers = self._killers.get(ply, [])
+        history = self._history
+
+        def rank(move):
+            killer_rank = killers.index(move) if move in killers else len(killers)
+            return (killer_rank, -history.get(move, 0), _PositionalOrdering._rank(move))
+
+        return sorted(moves, key = rank)
+
+    def record_cutoff(self, move, ply):
+        killers = self._killers.setdefault(ply, [])
+
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[_HistoryOrdering._killers_per_ply:]
+
+        #cutoffs near the root prune bigger subtrees, thus weighted more
+        remaining = _cell_count - ply
+        self._history[move] = self._history.get(move, 0) + remaining * remaining
+
+    def clear(self):
+        self._killers.clear()
+        self._history.clear()
+
+#perfect play table of the whole game, built offline by build_solution_table and read through a memory map the first time it is needed
+#the file holds a header followed by one 16-bit entry for every (state, player to move) pair, indexed by the base 3 encoding of the grid (0 empty, 1 X, 2 O) times 2 plus the player (0 X, 1 O).
+#entry bits: 15 set when the pair is reachable, 11-14 marks on the grid when the game ends under perfect play, 9-10 result + 1 (1 X wins, -1 O wins, 0 draw),
+#0-8 mask of every optimal move (fastest win, slowest loss). a path of None leaves the table unavailable
+class _SolutionTable:
+    _magic = b"TTTS"
+    _version = 2
+    _header = struct.Struct("<4sHHII")
+    _entry = struct.Struct("<H")
+
+    _reachable_flag = 1 << 15
+    _end_shift = 11
+    _score_shift = 9
+
+    def __init__(self, path):
+        self._path = path
+        self._entries = None
+        self._loaded = False
+
+    #returns (depth-adjusted score, mask of optimal moves) of the state with the given player to move, or None when the table is missing, stale, or doesn't know the state
+    def lookup(self, state, player):
+        if not self._loaded:
+            self._load()
+
+        if self._entries is None:
+            return None
+
+        entry = self._entries[_SolutionTable._index(state, player)]
+
+        if not entry & _SolutionTable._reachable_flag:
+            return None
+
+        result = (entry >> _SolutionTable._score_shift & 3) - 1
+        return (Engine._adjusted_score(result, entry >> _SolutionTable._end_shift & 15, _classic_rules), entry & _full_mask)
+
+    def is_available(self):
+        if not self._loaded:
+            self._load()
+
+        return self._entries is not None
+
+    def _index(state, player):
+        return (_ternary_codes[state.x_bits] + 2 * _ternary_codes[state.o_bits]) * 2 + (player == "O")
+
+    #identifies the rules the table was solved for, so a table built for another grid is recognized as stale
+    def _rules_signature():
+        return zlib.crc32(struct.pack(f"<{len(_win_masks)}I", *_win_masks))
+
+    #mapping the file and checking its header, a missing or stale file leaves the table unavailable so that the caller falls back to the search
+    def _load(self):
+        self._loaded = True
+
+        if self._path is None:
+            return
+
+        try:
+            with open(self._path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+
+        header = _SolutionTable._header
+        entry_count = 2 * 3 ** _cell_count
+
+        if len(mapped) != header.size + entry_count * _SolutionTable._entry.size:
+            return
+
+        magic, version, board_length, signature, checksum = header.unpack_from(mapped)
+        entries = memoryview(mapped)[header.size:]
+
+        if (magic != _SolutionTable._magic or version != _SolutionTable._version or board_length != _board_length
+                or signature != _SolutionTable._rules_signature() or checksum != zlib.crc32(entries)):
+            return
+
+        self._entries = entries.cast("H")
+
+_move_orderings = {"natural": _NaturalOrdering,
+                   "positional": _PositionalOrdering,
+                   "history": _HistoryOrdering}
+
+#headless engine: the state of one game and the computer that plays it. the transposition table, move ordering and solution table live as long as the engine,
+#so positions computed during one move (or one game) are reused by the next ones. TicTacToe is a view over an engine
+class Engine:
+
+    #maximum amount of positions kept in the transposition table. a 3x3 game only has 5478 reachable positions, so the default never evicts on this board
+    _transposition_table_size = 65536
+
+    #solution table built by "python engine.py --build-table", the search is used instead as long as the file doesn't exist
+    _solution_table_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.table")
+
+    #solution tables by path: the file is read-only, so the engines of a process share a single mapping of it
+    _solution_tables = {}
+
+    #how often the computer plays a random move instead of searching, for each difficulty
+    _random_move_chances = {"Normal": 0.2, "Hard": 0.05, "Impossible": 0}
+
+    #with the "budget" difficulty mode, (seconds, depth limit) of the search for each difficulty instead. None: the time budget given to best_move, no depth limit
+    _difficulty_limits = {"Normal": (0.05, 2), "Hard": (0.2, 4), "Impossible": (None, None)}
+
+    #seconds between two checks of the cancel event while the parallel search waits for its workers
+    _pool_poll_interval = 0.05
+
+    #preferences among actions of equal score: "natural" row by row (the action the plain minimax chooses), "center" the closest to the center first
+    _tie_breaks = ("natural", "center")
+
+    #search modes running the Monte Carlo tree search of mcts.py instead of minimax
+    _mcts_modes = ("mcts", "mcts-parallel")
+
+    _search_modes = ("alpha-beta", "minimax", "parallel") + _mcts_modes
+
+    #search_mode: "minimax" expands every action, "alpha-beta" prunes actions that can't change the decision, "parallel" splits the alpha-beta search of the root actions
+    #over a pool of worker processes (workers of them, the amount of cores by default). "mcts" plays random games instead (see mcts.py), within the time budget on every grid
+    #and iterations playouts when given, "mcts-parallel" grows one tree per worker process and sums their root moves. move_ordering: one of _move_orderings
+    #grid_length x grid_length grid where win_length straight cells win. seed: seed of the random moves, for reproducible games
+    #use_solution_table: False always searches, even when the solution table exists (e.g. to profile the search)
+    #difficulty_mode: "random" plays another action of the ranking now and then (see _random_move_chances), "budget" bounds the time and depth of the search instead (see _difficulty_limits)
+    #tie_break: one of _tie_breaks, deciding between actions of equal score. by default "natural" on grids up to 3x3 (the action the plain minimax chooses),
+    #"center" on bigger ones, where row by row would open in a corner of the grid
+    #transposition_table_size: maximum amount of positions kept in each transposition table of the engine and of its worker processes
+    def __init__(self, grid_length = 3, win_length = 3, search_mode = "alpha-beta", move_ordering = "history", seed = None, use_solution_table = True, workers = None, difficulty_mode = "random",
+                 tie_break = None, iterations = None, transposition_table_size = _transposition_table_size):
+        if difficulty_mode not in ("random", "budget"):
+            raise ValueError(f"difficulty mode must be random or budget, got {difficulty_mode!r}")
+
+        if tie_break is None:
+            tie_break = "center" if grid_length > 3 else "natural"
+
+        if tie_break not in Engine._tie_breaks:
+            raise ValueError(f"tie break must be one of {', '.join(Engine._tie_breaks)}, got {tie_break!r}")
+
+        if search_mode not in Engine._search_modes:
+            raise ValueError(f"search mode must be one of {', '.join(Engine._search_modes)}, got {search_mode!r}")
+
+        if move_ordering not in _move_orderings:
+            raise ValueError(f"move ordering must be one of {', '.join(_move_orderings)}, got {move_ordering!r}")
+
+        self.rules = _get_rules(grid_length, win_length)
+        self.state = _Board(rules = self.rules)
+        self.initial_repr = "X"
+        self._last_move = None
+
+        #cells (y * length + x) taken since the game started, in order
+        self.moves = []
+
+        #the exhaustive search of the classic grid and the depth-limited search store different entries, so each has its own table
+        self._transposition_table_size = transposition_table_size
+        self._transposition_table = _TranspositionTable(transposition_table_size)
+        self._limited_table = _TranspositionTable(transposition_table_size)
+        self._search_mode = search_mode
+        self._move_ordering_name = move_ordering
+        self._move_ordering = _move_orderings[move_ordering]()
+        self._workers = workers or os.cpu_count() or 1
+        self._pool = None
+
+        #generation of the latest parallel search, and the shared value holding the latest cancelled one (see _get_pool)
+        self._generation = 0
+        self._cancelled_generation = None
+        self._solution_table = Engine._get_solution_table(Engine._solution_table_path if use_solution_table else None)
+        self._random = random.Random(seed)
+        self._difficulty_mode = difficulty_mode
+        self._iterations = iterations
+
+        #tree of the Monte Carlo tree search, kept between the moves of a game
+        self._mcts = None
+
+        #the worker processes start in the background now, rather than within the time budget of the first move
+        if search_mode in ("parallel", "mcts-parallel"):
+            self._get_pool()
+
+        #rank of every cell in the tie break preference, the lower the better
+        preferred_cells = self.rules.center_order if tie_break == "center" else range(self.rules.cell_count)
+        self._preference = [0] * self.rules.cell_count
+        for rank, index in enumerate(preferred_cells):
+            self._preference[index] = rank
+
+    #clearing the grid, first_player (X or O) takes the first turn of the new game
+    def new_game(self, first_player = "X"):
+        self.state.clear()
+        self.initial_repr = first_player
+        self._last_move = None
+        self.moves = []
+
+    #X or O, whoever has to move
+    def player(self):
+        return Engine._player(self.state, self.initial_repr)
+
+    #actions (with x and y attributes) the player to move can make, none once the game has ended
+    def legal_moves(self):
+        if self.is_terminal():
+            return []
+
+        return Engine._get_actions(self.state)
+
+    #placing the mark of the player to move on the cell (x, y)
+    def apply(self, x, y):
+        if not (0 <= x < self.rules.length and 0 <= y < self.rules.length) or self.state.get(x, y) is not None:
+            raise ValueError(f"cell ({x}, {y}) is not an empty cell of the grid")
+
+        if self.is_terminal():
+            raise ValueError("the game has already ended")
+
+        self.state.place(x, y, self.player())
+        self._last_move = y * self.rules.length + x
+        self.moves.append(self._last_move)
+
+    def is_terminal(self):
+        return Engine._check_terminal_state(self.state, self._last_move)[0]
+
+    #X, O, or Draw once the game has ended, None before
+    def winner(self):
+        return Engine._get_winner(Engine._check_terminal_state(self.state, self._last_move)[1])
+
+    #deciding the action of the player to move, the first one of the ranking (see rank_moves). the difficulty decides how often another action of the ranking
+    #is played instead, or with the "budget" difficulty mode, how long and how deep the search may go, the move coming back within the budget on any grid.
+    #time_budget bounds the search on grids other than 3x3 (and every search with the "budget" mode) and setting the cancel event (a threading.Event) stops it early.
+    #the search runs on a copy of the state, so the engine can be read (but not modified) while a search runs on another thread. stats: optional SearchStats to fill
+    def best_move(self, difficulty = "Impossible", time_budget = 1.0, cancel = None, stats = None):
+        if difficulty not in Engine._random_move_chances:
+            raise ValueError(f"difficulty must be one of {', '.join(Engine._random_move_chances)}, got {difficulty!r}")
+
+        if self.is_terminal():
+            raise ValueError("the game has already ended")
+
+        if self._difficulty_mode == "budget":
+            seconds, max_depth = Engine._difficulty_limits[difficulty]
+            seconds = time_budget if seconds is None else min(seconds, time_budget)
+            return self.rank_moves(self.state.copy(), self.player(), seconds, cancel, stats, self.rules.cell_count if max_depth is None else max_depth, exact = False)[0][1]
+
+        ranking = self.rank_moves(self.state.copy(), self.player(), time_budget, cancel, stats, exact = False)
+
+        #the same draw as the original game: a random number between 0 and 100, normalized, under the threshold of the difficulty.
+        #the computer then plays one of the other actions of the ranking, which the same search has already scored
+        if self._random.randint(0, 100) / 100 < Engine._random_move_chances[difficulty] and len(ranking) > 1:
+            return self._random.choice(ranking[1:])[1]
+
+        return ranking[0][1]
+
+    #running the search mode chosen for this engine from the given state. returns (score, action) just like _max_value and _min_value, the score adjusted by the length of the game
+    #when the solution table is available, the decision is read from it instead: the first optimal cell row by row, the same action the plain minimax chooses
+    #on grids other than 3x3, or when max_depth is given, the search deepens iteratively up to max_depth moves and returns within time_budget seconds
+    #stats: optional SearchStats filled with the statistics of this search
+    def search(self, state, player, time_budget = 1.0, cancel = None, stats = None, max_depth = None):
+        return self._collecting(self._search, state, player, time_budget, cancel, stats, max_depth)
+
+    #every legal action of the player to move with its depth-adjusted score, as a list of (score, action), best first: the fastest win, the slowest loss,
+    #and actions of equal score in the tie break preference of the engine. the ranking comes from one pass of the same search as search (same arguments).
+    #exact: False only scores exactly the actions as good as the best one, the score of a worse action being a bound it can't do better than, which costs less
+    def rank_moves(self, state, player, time_budget = 1.0, cancel = None, stats = None, max_depth = None, exact = True):
+        ranking = self._collecting(self._rank_moves, state, player, time_budget, cancel, stats, max_depth, exact)
+        sign = -1 if player == "X" else 1
+        return [(score, state.rules.actions[move]) for move, score in sorted(ranking.items(), key = lambda item: (sign * item[1], self._preference[item[0]]))]
+
+    #running function (_search or _rank_moves), collecting its statistics in stats when given
+    def _collecting(self, function, state, player, time_budget, cancel, stats, max_depth, *args):
+        if stats is None:
+            return function(state, player, time_budget, cancel, None, max_depth, *args)
+
+        stats.start(state, self._limited_table if Engine._is_limited(state, max_depth) else self._transposition_table)
+        result = function(state, player, time_budget, cancel, stats, max_depth, *args)
+        stats.finish()
+        return result
+
+    def _is_limited(state, max_depth):
+        return not state.rules.is_classic() or max_depth is not None
+
+    #the solution table answers any search of the classic grid reaching the end of the game
+    def _reads_solution_table(state, max_depth):
+        return state.rules.is_classic() and (max_depth is None or max_depth >= _cell_count - _bit_counts[state.x_bits | state.o_bits])
+
+    def _search(self, state, player, time_budget, cancel, stats, max_depth):
+        if self._search_mode in Engine._mcts_modes and not Engine._check_terminal_state(state)[0]:
+            scores = self._mcts_scores(state, player, time_budget, cancel, stats)
+            sign = -1 if player == "X" else 1
+            move = min(scores, key = lambda move: (sign * scores[move], self._preference[move]))
+            return (scores[move], state.rules.actions[move])
+
+        if Engine._reads_solution_table(state, max_depth):
+            solution = self._solution_table.lookup(state, player)
+
+            if solution is not None:
+                if stats is not None:
+                    stats.source = "solution table"
+                return (solution[0], _cell_actions[_cell_moves[solution[1]][0]])
+
+        if Engine._is_limited(state, max_depth):
+            if self._search_mode == "parallel":
+                decision = self._parallel_iterative_deepening(state, player, time_budget, max_depth, cancel, stats)
+            else:
+                decision = Engine._iterative_deepening(state, player, time_budget, max_depth, self._limited_table, cancel, stats)
+            return (decision[0], decision[1])
+
+        if self._search_mode == "parallel":
+            decision = self._parallel_classic_search(state, player, cancel, stats)
+            if decision is not None:
+                return decision
+
+        if self._search_mode in ("alpha-beta", "parallel"):
+            if player == "X":
+                return Engine._alpha_beta_max(state, float("-inf"), float("inf"), self._move_ordering, self._transposition_table, stats)
+            return Engine._alpha_beta_min(state, float("-inf"), float("inf"), self._move_ordering, self._transposition_table, stats)
+
+        if player == "X":
+            return Engine._max_value(state, self._transposition_table, stats)
+        return Engine._min_value(state, self._transposition_table, stats)
+
+    #scores of every empty cell of the state ({cell: score}), from the solution table or from the search mode of the engine
+    def _rank_moves(self, state, player, time_budget, cancel, stats, max_depth, exact):
+        if Engine._check_terminal_state(state)[0]:
+            return {}
+
+        if self._search_mode in Engine._mcts_modes:
+            return self._mcts_scores(state, player, time_budget, cancel, stats)
+
+        if Engine._reads_solution_table(state, max_depth):
+            scores = self._solution_scores(state, player)
+
+            if scores is not None:
+                if stats is not None:
+                    stats.source = "solution table"
+                return scores
+
+        rank = "exact" if exact else "best"
+
+        if Engine._is_limited(state, max_depth):
+            if self._search_mode == "parallel":
+                return self._parallel_iterative_deepening(state, player, time_budget, max_depth, cancel, stats, rank)[3]
+            return Engine._iterative_deepening(state, player, time_budget, max_depth, self._limited_table, cancel, stats, rank)[3]
+
+        moves = list(self._move_ordering.order(_cell_moves[_full_mask ^ (state.x_bits | state.o_bits)], 0))
+
+        if self._search_mode == "parallel":
+            task = lambda move, alpha, beta: (state.x_bits, state.o_bits, player, move, alpha, beta, self._move_ordering_name, stats is not None)
+            decision = self._split_root(moves, player, _search_classic_root_move, task, None, cancel, stats, exact)
+
+            #cancelled: the caller drops the ranking anyway
+            if decision is None:
+                return dict.fromkeys(moves, 0)
+
+            return decision[2]
+
+        if stats is not None:
+            stats.visit(state)
+
+        return Engine._score_root_moves(moves, player, exact, lambda move, alpha, beta: self._classic_move_score(state, player, move, alpha, beta, stats))
+
+    #scores of every action, read from the entries of the states they lead to. None when the table is unavailable or doesn't know them
+    def _solution_scores(self, state, player):
+        opponent = "O" if player == "X" else "X"
+        scores = {}
+
+        for index in _cell_moves[_full_mask ^ (state.x_bits | state.o_bits)]:
+            bit = 1 << index
+            projected_state = _Board(state.x_bits | bit, state.o_bits) if player == "X" else _Board(state.x_bits, state.o_bits | bit)
+            solution = self._solution_table.lookup(projected_state, opponent)
+
+            if solution is None:
+                return None
+
+            scores[index] = solution[0]
+
+        return scores
+
+    #score of the classic state after player takes the cell move, searched with the search mode of the engine within (alpha, beta). the plain minimax ignores the window
+    def _classic_move_score(self, state, player, move, alpha, beta, stats):
+        bit = 1 << move
+
+        if player == "X":
+            state.x_bits |= bit
+            if self._search_mode == "minimax":
+                score = Engine._min_value(state, self._transposition_table, stats)[0]
+            else:
+                score = Engine._alpha_beta_min(state, alpha, beta, self._move_ordering, self._transposition_table, stats, 1)[0]
+            state.x_bits ^= bit
+        else:
+            state.o_bits |= bit
+            if self._search_mode == "minimax":
+                score = Engine._max_value(state, self._transposition_table, stats)[0]
+            else:
+                score = Engine._alpha_beta_max(state, alpha, beta, self._move_ordering, self._transposition_table, stats, 1)[0]
+            state.o_bits ^= bit
+
+        return score
+
+    #scores of the root moves ({move: score}, in the order given). score(move, alpha, beta) searches the state after the move within the window.
+    #exact scores every move with the full window; otherwise the first move gets the full window and the others everything better than the best score minus one,
+    #so that a move as good as the best one still gets its exact score while a worse one is cut off early, its score being a bound it can't do better than
+    def _score_root_moves(moves, player, exact, score):
+        maximizing = player == "X"
+        scores = {}
+        best = None
+
+        for move in moves:
+            if exact or best is None:
+                alpha, beta = float("-inf"), float("inf")
+            elif maximizing:
+                alpha, beta = best - 1, float("inf")
+            else:
+                alpha, beta = float("-inf"), best + 1
+
+            scores[move] = score(move, alpha, beta)
+
+            if best is None or (scores[move] > best if maximizing else scores[move] < best):
+                best = scores[move]
+
+        return scores
+    #scores of every empty cell from the Monte Carlo tree search: the playouts through the cell (the most played cell being the decision), cells proven to win
+    #above every other and cells proven to lose below every other, negated for O like the minimax scores. the search ignores the depth limit, only the time budget and iterations bound it
+    def _mcts_scores(self, state, player, time_budget, cancel, stats):
+        from mcts import _win, _loss
+
+        if self._search_mode == "mcts-parallel":
+            results, iterations = self._parallel_mcts(state, player, time_budget, cancel)
+        else:
+            results, iterations = self._get_mcts().search(state, player, self._iterations, time_budget, cancel)
+
+        if stats is not None:
+            stats.source = "mcts"
+            stats.nodes += iterations
+
+        total = sum(result[0] for result in results.values()) + 1
+        sign = 1 if player == "X" else -1
+        scores = {}
+
+        for move, (visits, wins, proven) in results.items():
+            if proven == _win:
+                visits += total
+            elif proven == _loss:
+                visits -= total
+            scores[move] = sign * visits
+
+        return scores
+
+    def _get_mcts(self):
+        if self._mcts is None:
+            #imported on first use, mcts.py builds on this module
+            from mcts import MonteCarloTreeSearch
+            self._mcts = MonteCarloTreeSearch(self.rules.length, self.rules.win_length, self._random)
+
+        return self._mcts
+
+    #root parallelization: one task per worker of the pool grows a new tree from the state (splitting the iterations, each within the whole time budget),
+    #and the playouts and wins of each root move are summed. the time budget counts from the call: past it, the tasks still running send the playouts they have,
+    #and the ones no worker has started are dropped. returns the merged results and iterations like MonteCarloTreeSearch.search
+    def _parallel_mcts(self, state, player, time_budget, cancel):
+        from concurrent.futures import wait
+        from mcts import _search_root
+
+        rules = state.rules
+        deadline = time.perf_counter() + time_budget
+        pool = self._get_pool()
+        self._generation += 1
+        iterations = None if self._iterations is None else -(-self._iterations // self._workers)
+        pending = {pool.submit(_search_root, rules.length, rules.win_length, state.x_bits, state.o_bits, player, iterations, time_budget, self._random.getrandbits(32), self._generation)
+                   for _ in range(self._workers)}
+        results = dict.fromkeys(Engine._ordered_moves(rules, state.x_bits | state.o_bits, None), (0, 0.0, None))
+        total_iterations = 0
+        stopped = False
+
+        while pending:
+            done, pending = wait(pending, timeout = Engine._pool_poll_interval)
+
+            #cancelled: the caller drops the ranking anyway
+            if cancel is not None and cancel.is_set():
+                self._cancel_workers(pending)
+                return (dict.fromkeys(results, (0, 0.0, None)), total_iterations)
+
+            for future in done:
+                if future.cancelled():
+                    continue
+
+                worker_results, worker_iterations = future.result()
+                total_iterations += worker_iterations
+
+                for move, (visits, wins, proven) in worker_results.items():
+                    merged = results[move]
+                    results[move] = (merged[0] + visits, merged[1] + wins, merged[2] if proven is None else proven)
+
+            #out of time: one more poll for the results of the stopped tasks, the others (e.g. waiting for a worker to start) are left behind
+            if stopped:
+                break
+
+            if pending and time.perf_counter() >= deadline:
+                self._cancel_workers(pending)
+                stopped = True
+
+        return (results, total_iterations)
+
+    #hit and miss counters of the transposition tables, accumulated since the engine was created
+    def get_cache_stats(self):
+        return (self._transposition_table.hits + self._limited_table.hits, self._transposition_table.misses + self._limited_table.misses)
+
+    #stopping the worker processes of the parallel search, if they were started. the engine starts them again if it searches afterwards
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures = True)
+            self._pool = None
+
+    def _get_solution_table(path):
+        if path not in Engine._solution_tables:
+            Engine._solution_tables[path] = _SolutionTable(path)
+
+        return Engine._solution_tables[path]
+
+    '''
+    Parallel search documentation
+
+    The root actions are split over a pool of worker processes, started in the background when the engine is created (or by the first search after close)
+    and reused by every following search, so the cost of starting the processes is paid once per engine. Each worker keeps its own transposition table and move ordering between tasks.
+    The time budget of a search counts from the call, so a search that has to wait for the processes to start searches less rather than answering late:
+    once it runs out, the engine stops the tasks it still waits for, whether the worker has started them or not.
+
+    The first root action (in the order the serial search would try them) is searched alone, to get a bound (young brothers wait);
+    the other actions are then sent to the workers in order, each one with the best score known when it is sent as the bound of its window.
+    The bound is loosened by one (scores are integers), so an action as good as the best one still gets its exact score, while a worse one is cut off early.
+    Once every action has been searched, the decision is the first action, in the serial order, with the best score, whatever order the workers finish in.
+    On the classic grid the serial search is the alpha-beta search; on bigger grids, every depth of the iterative deepening is split.
+    The score is the one of the serial search, but not always the action: the history and killer cutoffs recorded by the workers stay in their own move orderings,
+    so the serial order of the root (and with it the first action of the best score) can differ from the serial engine's. best_move and rank_moves break ties
+    by the tie break preference instead, so they play the same move as the serial engine.
+
+    Every split search is a new generation, which its tasks carry. Cancelling it (or a worker running out of time) writes its generation in a value shared with the workers,
+    and the depth-limited searches of the workers stop at their next check once it has reached their own generation. The exhaustive searches of the classic grid
+    take a few milliseconds and always finish.
+    '''
+
+    def _get_pool(self):
+        if self._pool is None:
+            #imported on first use, so that the engines that never search in parallel (the GUI, the server, tournament workers) don't pay for them
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            #spawned rather than forked, so that the workers don't inherit the threads of the caller (e.g. the GUI)
+            context = multiprocessing.get_context("spawn")
+            self._cancelled_generation = context.RawValue("q", 0)
+            self._pool = ProcessPoolExecutor(max_workers = self._workers, mp_context = context,
+                                             initializer = _init_worker, initargs = (self._transposition_table_size, self._cancelled_generation))
+
+            #one empty task per worker, so that every process starts (and imports this module) without waiting for a search
+            for _ in range(self._workers):
+                self._pool.submit(_warm_up_worker)
+
+        return self._pool
+
+    #searching the root actions (moves, in serial order) with the pool. task(move, alpha, beta) returns the arguments of worker for that move,
+    #which returns (score, nodes, seconds), or None when its time budget ran out. stop_score: score that can't be improved, no more actions are sent once it is reached
+    #exact: every action gets the full window, as in _score_root_moves. deadline: time.perf_counter() past which the engine stops waiting for the workers, None to wait for every action
+    #returns (score, move, scores of the actions) of the decision, or None when a worker ran out of time, the deadline passed or the search was cancelled
+    def _split_root(self, moves, player, worker, task, stop_score, cancel, stats, exact = False, deadline = None):
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        pool = self._get_pool()
+        self._generation += 1
+        maximizing = player == "X"
+        scores = {}
+        best = None
+        pending = {}
+        next_move = 0
+        limit = 1
+
+        while True:
+            while next_move < len(moves) and len(pending) < limit and (best is None or best != stop_score):
+                #the window of the move: everything better than the best score minus one
+                if best is None or exact:
+                    alpha, beta = float("-inf"), float("inf")
+                elif maximizing:
+                    alpha, beta = best - 1, float("inf")
+                else:
+                    alpha, beta = float("-inf"), best + 1
+
+                move = moves[next_move]
+                pending[pool.submit(worker, *task(move, alpha, beta))] = (move, alpha, beta)
+                next_move += 1
+
+            if not pending:
+                break
+
+            done = wait(pending, timeout = Engine._pool_poll_interval, return_when = FIRST_COMPLETED)[0]
+
+            if cancel is not None and cancel.is_set():
+                self._cancel_workers(pending)
+                return None
+
+            for future in done:
+                move, alpha, beta = pending.pop(future)
+                result = future.result()
+
+                if result is None:
+                    self._cancel_workers(pending)
+                    return None
+
+                score, nodes, seconds = result
+
+                if stats is not None:
+                    stats.nodes += nodes
+                    stats.root_move_seconds[move] = stats.root_move_seconds.get(move, 0.0) + seconds
+
+                #a score inside the window is exact, one on its border only tells the move is worse than the best one
+                scores[move] = score
+                if alpha < score < beta and (best is None or (score > best if maximizing else score < best)):
+                    best = score
+
+            #the workers bound their own searches, but a task still waiting for a worker to start doesn't
+            if pending and deadline is not None and time.perf_counter() >= deadline:
+                self._cancel_workers(pending)
+                return None
+
+            #the eldest brother has been searched, the others can go in parallel
+            limit = self._workers
+
+        return (best, next(move for move in moves if scores.get(move) == best), scores)
+
+    #dropping the tasks of the current generation still waiting for a worker, and stopping the ones already running
+    def _cancel_workers(self, pending):
+        for future in pending:
+            future.cancel()
+
+        self._cancelled_generation.value = self._generation
+
+    #parallel alpha-beta search of the classic grid: the root actions are the cells left once symmetric ones are removed, in the order of the move ordering
+    #returns None on a terminal state, which the serial search handles
+    def _parallel_classic_search(self, state, player, cancel, stats):
+        distinct_cells = Engine._canonicalize(state)[2]
+        moves = self._move_ordering.order(_cell_moves[distinct_cells & ~(state.x_bits | state.o_bits)], 0)
+
+        if Engine._check_classic_terminal_state(state)[0] or not moves:
+            return None
+
+        best_possible = _win_score - _bit_counts[state.x_bits | state.o_bits] - 1
+        stop_score = best_possible if player == "X" else -best_possible
+        task = lambda move, alpha, beta: (state.x_bits, state.o_bits, player, move, alpha, beta, self._move_ordering_name, stats is not None)
+        decision = self._split_root(list(moves), player, _search_classic_root_move, task, stop_score, cancel, stats)
+
+        #cancelled: the caller drops the decision anyway
+        if decision is None:
+            return (0, _cell_actions[moves[0]])
+
+        return (decision[0], _cell_actions[decision[1]])
+
+    #iterative deepening like _iterative_deepening, every depth being split over the pool. returns (score, action, completed depth, scores of the root moves when ranking)
+    def _parallel_iterative_deepening(self, state, player, time_budget, max_depth, cancel, stats, rank = None):
+        rules = state.rules
+        deadline = time.perf_counter() + time_budget
+        occupied = state.x_bits | state.o_bits
+        remaining_moves = rules.cell_count - bin(occupied).count("1")
+
+        if max_depth is None or max_depth > remaining_moves:
+            max_depth = remaining_moves
+
+        empty = rules.full_mask ^ occupied
+        decision = (0, next(index for index in rules.center_order if empty >> index & 1), 0)
+        scores = dict.fromkeys(Engine._ordered_moves(rules, occupied, None), 0) if rank is not None else None
+
+        for depth in range(1, max_depth + 1):
+            #the best move of the previous depth first, the same order as the serial search
+            moves = list(Engine._ordered_moves(rules, occupied, decision[1] if decision[2] else None))
+            task = lambda move, alpha, beta: (rules.length, rules.win_length, state.x_bits, state.o_bits, player, move, depth, alpha, beta, deadline - time.perf_counter(), self._generation)
+            result = self._split_root(moves, player, _search_limited_root_move, task, None, cancel, stats, rank == "exact", deadline)
+
+            if result is None:
+                break
+
+            decision = (result[0], result[1], depth)
+            if rank is not None:
+                scores = result[2]
+
+            settled = scores.values() if rank == "exact" else (result[0],)
+            if all(abs(value) >= rules.win_score - rules.cell_count for value in settled) or time.perf_counter() >= deadline:
+                break
+
+        if stats is not None:
+            stats.depth = decision[2]
+
+        return (decision[0], rules.actions[decision[1]], decision[2], scores)
+
+    #checking whether the current state is a terminal state (where the game ends with or without winner)
+    #on the classic grid, the line table holds, for every possible bitmask of one player, whether it contains 3 straight cells, so the check is a pair of lookups
+    #on other grids the lines are checked one by one, only the lines passing through the last move (index of the cell) when it is known
+    def _check_terminal_state(state, last_move = None):
+        rules = state.rules
+
+        if rules is _classic_rules:
+            return Engine._check_classic_terminal_state(state)
+
+        if last_move is None:
+            lines = rules.win_masks
+        else:
+            lines = rules.cell_lines[last_move]
+
+        if any(state.x_bits & line == line for line in lines):
+            return (True, 1)
+
+        if any(state.o_bits & line == line for line in lines):
+            return (True, -1)
+
+        if state.x_bits | state.o_bits == rules.full_mask:
+            return (True, 0)
+
+        return (False, None)
+
+    #terminal check of the classic grid, called directly by the exhaustive searches
+    def _check_classic_terminal_state(state):
+        if _line_table[state.x_bits]:
+            return (True, 1)
+
+        if _line_table[state.o_bits]:
+            return (True, -1)
+
+        #check whether the game has ended by circumstance where all cells have been filled
+        if state.x_bits | state.o_bits == _full_mask:
+            return (True, 0)
+
+        return (False, None)
+
+    #depth-adjusted score of an ended game from its result (1 X wins, -1 O wins, 0 draw) and the amount of marks on the grid:
+    #a win is worth the win score of the rules minus the marks, so that faster wins score higher, and slower losses higher than faster ones
+    def _adjusted_score(result, marks, rules):
+        return result * (rules.win_score - marks)
+    
+    '''
+    Minimax algorithm documentation
+
+    Initially, the computer will find all the possible actions / moves to choose. 
+    The potential actions / moves then are applied to the state (setting the bit of the cell), resulting in the new state.
+    How does the computer know whether an action / move is the best move? The computer will put itself on the opponent's shoes.
+    Assuming that the computer player is X. It will implement max_value method and put itself on the opponent perspective to evaluate each projected / new state.
+    The evaluation of each new state is done by implementing the opposite logic: min_value method, since the opponent has opposite objective to the computer.
+    This process will be done recursively until it hits the base case where the min_value or max_value methods return the terminal state score (when the game hits terminal state).
+    The value get from base case then will be pased all the way up to the original method (the first method to be called) and this method will return the best score with its action.
+    With best action known, the computer use that action to make the move.
+
+    The search works on one board only: an action is applied by setting its bit before the recursion and undone by clearing it right after,
+    so the board is back to its original state when the method returns and no copy is ever made.
+    _max_value is always called when X is to move and _min_value when O is to move, so the methods don't need to know who took the initial turn.
+
+    The score of an ended game is adjusted by its length (see _adjusted_score), like in the depth-limited search: positive when X wins, negative when O wins, 0 for a draw,
+    and the further from 0 the sooner the win. Among winning actions the search thus takes the fastest win, and among losing ones the slowest loss, instead of the first one found.
+
+    Since the same state can be reached through different orders of moves, both methods optionally receive a transposition table.
+    Before expanding a state, the table is consulted and the stored result is returned if the state has been evaluated before, otherwise the result is stored after the expansion.
+
+    With a table, the search also exploits the 8 symmetries of the grid (4 rotations, 4 reflections): a state and its rotations / reflections have the same score,
+    so the table is keyed by the canonical form of the state (the smallest encoding among its 8 symmetric images) and stores the chosen move as a cell of the canonical form,
+    translated back to the actual grid when it is read. Actions that are symmetric to an action already evaluated in the same state (e.g. the 4 corners of the empty grid) are skipped.
+    The resulting score is unchanged; among equally good actions, the chosen one may be a symmetric image of the one the plain search chooses.
+    '''
+
+    def _max_value(state, table = None, counter = None):
+
+        if counter is not None:
+            counter.visit(state)
+
+        #cells worth trying: every cell without a table, only one cell of each group of symmetric cells with a table
+        distinct_cells = _full_mask
+
+        if table is not None:
+            key, transform, distinct_cells = Engine._canonicalize(state)
+            key <<= 1
+            cached = table.get(key)
+
+            if cached is not None:
+                return Engine._from_canonical(cached[0], cached[1], transform)
+
+        if counter is not None:
+            counter.terminal_checks += 1
+
+        game_state = Engine._check_classic_terminal_state(state)
+        
+        is_terminal_state = game_state[0]
+
+        score = game_state[1]
+
+        #base case where the state is the terminal state. returns the score of the winner (positive for X, negative for O, 0 for a draw), adjusted by the length of the game
+        if is_terminal_state:
+            score = Engine._adjusted_score(score, _bit_counts[state.x_bits | state.o_bits], _classic_rules)
+
+            if table is not None:
+                table.put(key, (score, None))
+
+            return (score, None)
+
+        #minus infinity to ensure that the algorithm runs nevertheless how little is the value of an action
+        max_value = float("-inf")
+        chosen_move = None
+
+        for index in _cell_moves[distinct_cells & ~(state.x_bits | state.o_bits)]:
+            bit = 1 << index
+
+            #modify state: apply the action, evaluate the resulting state, then undo the action
+            state.x_bits |= bit
+
+            #putting the agent on the opponent shoes, reversing the algorithm until it hits base case
+            action_value = Engine._min_value(state, table, counter)[0]
+
+            state.x_bits ^= bit
+
+            #choosing the best action among all possible actions 
+            if action_value > max_value:
+                max_value = action_value
+                chosen_move = index
+
+        if table is not None:
+            table.put(key, (max_value, _symmetries[transform][chosen_move]))
+
+        #returning max value and chosen action. max value is necessary for recursion, while chosen action is necessary to know which action is the best
+        return (max_value, _cell_actions[chosen_move])
+
+    #same general principle, exactly opposite logic
+    def _min_value(state, table = None, counter = None):
+
+        if counter is not None:
+            counter.visit(state)
+
+        distinct_cells = _full_mask
+
+        if table is not None:
+            key, transform, distinct_cells = Engine._canonicalize(state)
+            key = key << 1 | 1
+            cached = table.get(key)
+
+            if cached is not None:
+                return Engine._from_canonical(cached[0], cached[1], transform)
+
+        if counter is not None:
+            counter.terminal_checks += 1
+
+        game_state = Engine._check_classic_terminal_state(state)
+        is_terminal_state = game_state[0]
+        score = game_state[1]
+
+        if is_terminal_state:
+            score = Engine._adjusted_score(score, _bit_counts[state.x_bits | state.o_bits], _classic_rules)
+
+            if table is not None:
+                table.put(key, (score, None))
+
+            return (score, None)
+
+        min_value = float("inf")
+        chosen_move = None
+
+        for index in _cell_moves[distinct_cells & ~(state.x_bits | state.o_bits)]:
+            bit = 1 << index
+
+            state.o_bits |= bit
+
+            #putting the agent on the opponent shoes, reversing the algorithm
+            action_value = Engine._max_value(state, table, counter)[0]
+
+            state.o_bits ^= bit
+
+            if action_value < min_value:
+                min_value = action_value
+                chosen_move = index
+
+        if table is not None:
+            table.put(key, (min_value, _symmetries[transform][chosen_move]))
+
+        return (min_value, _cell_actions[chosen_move])
+
+    '''
+    Alpha-beta pruning documentation
+
+    Same recursion as _max_value and _min_value, with two additional values passed down: alpha, the score the max player is already guaranteed elsewhere in the tree,
+    and beta, the score the min player is already guaranteed. Once a state is proven to be worse for one of the players than what it already has (alpha >= beta),
+    the remaining actions of that state can't change the decision and are skipped. A player that finds an action reaching its best possible score stops as well.
+    The resulting score is the same as the plain minimax; without a table, the action is the first optimal action in the order given by the move ordering
+    (with the natural ordering, exactly the action _max_value and _min_value choose).
+
+    A pruned search only knows a bound of the score of some states, so the entries it stores in the transposition table carry a flag telling whether
+    the score is exact, a lower bound, or an upper bound. Because of that, a table filled by this search must not be shared with the plain minimax.
+    The table is keyed by canonical forms and symmetric actions are skipped, exactly like in _max_value and _min_value.
+    '''
+
+    _exact = 0
+    _lower_bound = 1
+    _upper_bound = 2
+
+    def _alpha_beta_max(state, alpha, beta, ordering, table = None, counter = None, ply = 0):
+
+        if counter is not None:
+            counter.visit(state)
+
+        distinct_cells = _full_mask
+
+        if table is not None:
+            key, transform, distinct_cells = Engine._canonicalize(state)
+            key <<= 1
+            cached = Engine._probe(table, key, alpha, beta, transform)
+
+            if cached is not None:
+                return cached
+
+        if counter is not None:
+            counter.terminal_checks += 1
+
+        game_state = Engine._check_classic_terminal_state(state)
+        occupied = state.x_bits | state.o_bits
+
+        if game_state[0]:
+            score = Engine._adjusted_score(game_state[1], _bit_counts[occupied], _classic_rules)
+
+            if table is not None:
+                table.put(key, (score, None, Engine._exact))
+
+            return (score, None)
+
+        possible_moves = ordering.order(_cell_moves[distinct_cells & ~occupied], ply)
+
+        #the best score the player can reach from this state: winning with the next move
+        best_possible = _win_score - _bit_counts[occupied] - 1
+
+        initial_alpha = alpha
+        max_value = float("-inf")
+        chosen_move = None
+
+        for index in possible_moves:
+            bit = 1 << index
+
+            state.x_bits |= bit
+            action_value = Engine._alpha_beta_min(state, alpha, beta, ordering, table, counter, ply + 1)[0]
+            state.x_bits ^= bit
+
+            if action_value > max_value:
+                max_value = action_value
+                chosen_move = index
+
+            alpha = max(alpha, max_value)
+
+            #the min player won't allow this state to happen, or the max player can't do any better
+            if alpha >= beta or max_value >= best_possible:
+                ordering.record_cutoff(index, ply)
+                break
+
+        if table is not None:
+            Engine._store(table, key, max_value, _symmetries[transform][chosen_move], initial_alpha, beta)
+
+        return (max_value, _cell_actions[chosen_move])
+
+    def _alpha_beta_min(state, alpha, beta, ordering, table = None, counter = None, ply = 0):
+
+        if counter is not None:
+            counter.visit(state)
+
+        distinct_cells = _full_mask
+
+        if table is not None:
+            key, transform, distinct_cells = Engine._canonicalize(state)
+            key = key << 1 | 1
+            cached = Engine._probe(table, key, alpha, beta, transform)
+
+            if cached is not None:
+                return cached
+
+        if counter is not None:
+            counter.terminal_checks += 1
+
+        game_state = Engine._check_classic_terminal_state(state)
+        occupied = state.x_bits | state.o_bits
+
+        if game_state[0]:
+            score = Engine._adjusted_score(game_state[1], _bit_counts[occupied], _classic_rules)
+
+            if table is not None:
+                table.put(key, (score, None, Engine._exact))
+
+            return (score, None)
+
+        possible_moves = ordering.order(_cell_moves[distinct_cells & ~occupied], ply)
+
+        #the best score the player can reach from this state: winning with the next move
+        best_possible = _win_score - _bit_counts[occupied] - 1
+
+        initial_beta = beta
+        min_value = float("inf")
+        chosen_move = None
+
+        for index in possible_moves:
+            bit = 1 << index
+
+            state.o_bits |= bit
+            action_value = Engine._alpha_beta_max(state, alpha, beta, ordering, table, counter, ply + 1)[0]
+            state.o_bits ^= bit
+
+            if action_value < min_value:
+                min_value = action_value
+                chosen_move = index
+
+            beta = min(beta, min_value)
+
+            if alpha >= beta or min_value <= -best_possible:
+                ordering.record_cutoff(index, ply)
+                break
+
+        if table is not None:
+            Engine._store(table, key, min_value, _symmetries[transform][chosen_move], alpha, initial_beta)
+
+        return (min_value, _cell_actions[chosen_move])
+
+    #looking up a state in the table of the alpha-beta search. a stored bound is only usable when it already decides the state within the (alpha, beta) window
+    def _probe(table, key, alpha, beta, transform):
+        cached = table.get(key)
+
+        if cached is None:
+            return None
+
+        score, move, flag = cached
+
+        if flag == Engine._exact or (flag == Engine._lower_bound and score >= beta) or (flag == Engine._upper_bound and score <= alpha):
+            return Engine._from_canonical(score, move, transform)
+
+        return None
+
+    def _store(table, key, score, move, alpha, beta):
+        table.put(key, (score, move, Engine._bound_flag(score, alpha, beta)))
+
+    #encoding the state into one integer (bits of X followed by bits of O)
+    def _encode_state(state):
+        return state.x_bits << _cell_count | state.o_bits
+
+    #finding the canonical form of the state: the smallest encoding among the state and its 7 symmetric images
+    #returns the canonical encoding, the symmetry that turns the state into its canonical form, and the cells worth trying as actions:
+    #the symmetries that leave the state unchanged split the cells into groups of equivalent cells, only the smallest cell of each group is kept
+    def _canonicalize(state):
+        x_bits = state.x_bits
+        o_bits = state.o_bits
+        encoding = x_bits << _cell_count | o_bits
+
+        canonical = encoding
+        transform = 0
+        stabilizer = 0
+
+        for symmetry in range(len(_symmetry_tables)):
+            table = _symmetry_tables[symmetry]
+            image = table[x_bits] << _cell_count | table[o_bits]
+
+            if image < canonical:
+                canonical = image
+                transform = symmetry
+
+            #symmetries that leave the state unchanged make their symmetric cells interchangeable
+            if image == encoding:
+                stabilizer |= 1 << symmetry
+
+        return (canonical, transform, _distinct_cells[stabilizer])
+
+    #translating a move stored as a cell of the canonical form back to the action on the actual grid
+    def _from_canonical(score, move, transform):
+        if move is None:
+            return (score, None)
+
+        return (score, _cell_actions[_inverse_symmetries[transform][move]])
+    
+    '''
+    Depth-limited search documentation
+
+    The exhaustive searches above can't finish on grids bigger than 3x3, so the other grids are searched with alpha-beta up to a limited depth (amount of moves ahead).
+    States at the depth limit are scored by _evaluate instead of being expanded: every line of win_length cells that holds the marks of one player only
+    is still winnable by that player, and is worth more the more marks it already holds.
+    A win is worth the win score of the rules (more than any evaluation can reach) minus the amount of marks on the grid at the time of the win,
+    so that faster wins (and slower losses) are preferred.
+    The score only depends on the state, which allows the transposition table to be shared by every depth of every move of the game.
+
+    The depth is increased one by one (iterative deepening) until the time budget runs out, the result is proven, or the whole game has been searched.
+    Each iteration tries the best move of the previous one first, thanks to the move stored in the table, which makes the deeper iterations prune more.
+    The search checks the clock (and the cancel event) every _clock_interval states and gives up the running iteration when the budget is exceeded;
+    the decision of the last completed iteration is then used.
+
+    Only the lines passing through the last move are checked for a win, since any other line was already checked when its last mark was placed.
+    '''
+
+    #small enough that the search stops within about a millisecond of its deadline, even on big grids where every state evaluates many lines
+    _clock_interval = 16
+
+    #decision of the depth-limited search for the player to move. returns (score, action, completed depth, scores of the root moves when ranking)
+    #rank: None only searches for the decision, "exact" or "best" scores every root move at every depth (see _score_root_moves, "best" leaving exact off)
+    def _iterative_deepening(state, player, time_budget, max_depth = None, table = None, cancel = None, stats = None, rank = None):
+        rules = state.rules
+        search = _LimitedSearch(rules, time.perf_counter() + time_budget, table, cancel, stats)
+        remaining_moves = rules.cell_count - bin(state.x_bits | state.o_bits).count("1")
+
+        if max_depth is None or max_depth > remaining_moves:
+            max_depth = remaining_moves
+
+        #until the first iteration completes, the most central empty cell is the decision
+        occupied = state.x_bits | state.o_bits
+        decision = (0, next(index for index in rules.center_order if not occupied >> index & 1), 0)
+        scores = dict.fromkeys(Engine._ordered_moves(rules, occupied, None), 0) if rank is not None else None
+
+        for depth in range(1, max_depth + 1):
+            try:
+                if rank is not None:
+                    if stats is not None:
+                        stats.visit(state)
+
+                    #the moves in the ranking of the previous depth, so that the best ones come first
+                    ordered = sorted(scores, key = lambda move: -scores[move] if player == "X" else scores[move])
+                    depth_scores = Engine._score_root_moves(ordered, player, rank == "exact",
+                                                            lambda move, alpha, beta: Engine._limited_move_score(state, player, move, depth, alpha, beta, search))
+                    best = max(depth_scores.values()) if player == "X" else min(depth_scores.values())
+                    score, move = best, next(move for move in ordered if depth_scores[move] == best)
+                elif player == "X":
+                    score, move = Engine._limited_max(state, depth, float("-inf"), float("inf"), search)
+                else:
+                    score, move = Engine._limited_min(state, depth, float("-inf"), float("inf"), search)
+            except _SearchTimeout:
+                break
+
+            decision = (score, move, depth)
+            if rank is not None:
+                scores = depth_scores
+
+            #a forced win or loss has been found, deeper iterations can't change it. an exact ranking waits for the score of every move to be settled
+            settled = scores.values() if rank == "exact" else (score,)
+            if all(abs(value) >= rules.win_score - rules.cell_count for value in settled):
+                break
+
+            if search.is_over():
+                break
+
+        if stats is not None:
+            stats.depth = decision[2]
+
+        return (decision[0], rules.actions[decision[1]], decision[2], scores)
+
+    #depth-limited score of the state after player takes the cell move, within (alpha, beta): the win or the draw the move makes, or the search of the state it leads to
+    def _limited_move_score(state, player, move, depth, alpha, beta, search):
+        rules = search.rules
+        occupied = state.x_bits | state.o_bits
+        marks = bin(occupied).count("1") + 1
+        bit = 1 << move
+
+        if player == "X":
+            state.x_bits |= bit
+            try:
+                if any(state.x_bits & line == line for line in rules.cell_lines[move]):
+                    return rules.win_score - marks
+                elif occupied | bit == rules.full_mask:
+                    return 0
+                return Engine._limited_min(state, depth - 1, alpha, beta, search)[0]
+            finally:
+                state.x_bits ^= bit
+
+        state.o_bits |= bit
+        try:
+            if any(state.o_bits & line == line for line in rules.cell_lines[move]):
+                return marks - rules.win_score
+            elif occupied | bit == rules.full_mask:
+                return 0
+            return Engine._limited_max(state, depth - 1, alpha, beta, search)[0]
+        finally:
+            state.o_bits ^= bit
+
+    def _limited_max(state, depth, alpha, beta, search):
+        rules = search.rules
+
+        search.nodes += 1
+        if search.nodes % Engine._clock_interval == 0 and search.is_over():
+            raise _SearchTimeout()
+
+        if search.stats is not None:
+            search.stats.visit(state)
+
+        if depth == 0:
+            return (Engine._evaluate(state), None)
+
+        occupied = state.x_bits | state.o_bits
+        key = (state.x_bits << rules.cell_count | state.o_bits) << 1
+        first_move = None
+
+        if search.table is not None:
+            cached = search.table.get(key)
+
+            if cached is not None:
+                cached_depth, score, move, flag = cached
+                if cached_depth >= depth and (flag == Engine._exact or (flag == Engine._lower_bound and score >= beta) or (flag == Engine._upper_bound and score <= alpha)):
+                    return (score, move)
+                first_move = move
+
+        marks = bin(occupied).count("1") + 1
+        initial_alpha = alpha
+        max_value = float("-inf")
+        chosen_move = None
+
+        for index in Engine._ordered_moves(rules, occupied, first_move):
+            bit = 1 << index
+            state.x_bits |= bit
+
+            #the mark is taken back even when the search times out below, so that the caller's state is left as it was
+            try:
+                if search.stats is not None:
+                    search.stats.terminal_checks += 1
+
+                if any(state.x_bits & line == line for line in rules.cell_lines[index]):
+                    action_value = rules.win_score - marks
+                elif occupied | bit == rules.full_mask:
+                    action_value = 0
+                else:
+                    action_value = Engine._limited_min(state, depth - 1, alpha, beta, search)[0]
+            finally:
+                state.x_bits ^= bit
+
+            if action_value > max_value:
+                max_value = action_value
+                chosen_move = index
+
+            alpha = max(alpha, max_value)
+
+            if alpha >= beta:
+                break
+
+        if search.table is not None:
+            search.table.put(key, (depth, max_value, chosen_move, Engine._bound_flag(max_value, initial_alpha, beta)))
+
+        return (max_value, chosen_move)
+
+    def _limited_min(state, depth, alpha, beta, search):
+        rules = search.rules
+
+        search.nodes += 1
+        if search.nodes % Engine._clock_interval == 0 and search.is_over():
+            raise _SearchTimeout()
+
+        if search.stats is not None:
+            search.stats.visit(state)
+
+        if depth == 0:
+            return (Engine._evaluate(state), None)
+
+        occupied = state.x_bits | state.o_bits
+        key = (state.x_bits << rules.cell_count | state.o_bits) << 1 | 1
+        first_move = None
+
+        if search.table is not None:
+            cached = search.table.get(key)
+
+            if cached is not None:
+                cached_depth, score, move, flag = cached
+                if cached_depth >= depth and (flag == Engine._exact or (flag == Engine._lower_bound and score >= beta) or (flag == Engine._upper_bound and score <= alpha)):
+                    return (score, move)
+                first_move = move
+
+        marks = bin(occupied).count("1") + 1
+        initial_beta = beta
+        min_value = float("inf")
+        chosen_move = None
+
+        for index in Engine._ordered_moves(rules, occupied, first_move):
+            bit = 1 << index
+            state.o_bits |= bit
+
+            #the mark is taken back even when the search times out below, so that the caller's state is left as it was
+            try:
+                if search.stats is not None:
+                    search.stats.terminal_checks += 1
+
+                if any(state.o_bits & line == line for line in rules.cell_lines[index]):
+                    action_value = marks - rules.win_score
+                elif occupied | bit == rules.full_mask:
+                    action_value = 0
+                else:
+                    action_value = Engine._limited_max(state, depth - 1, alpha, beta, search)[0]
+            finally:
+                state.o_bits ^= bit
+
+            if action_value < min_value:
+                min_value = action_value
+                chosen_move = index
+
+            beta = min(beta, min_value)
+
+            if alpha >= beta:
+                break
+
+        if search.table is not None:
+            search.table.put(key, (depth, min_value, chosen_move, Engine._bound_flag(min_value, alpha, initial_beta)))
+
+        return (min_value, chosen_move)
+
+    #empty cells from the center outwards, starting with the move the table remembers for the state
+    def _ordered_moves(rules, occupied, first_move):
+        if first_move is not None:
+            yield first_move
+
+        for index in rules.center_order:
+            if not occupied >> index & 1 and index != first_move:
+                yield index
+
+    #score of a non-terminal state at the depth limit: lines open for X count positively, lines open for O negatively, 10 times more for every mark in the line
+    def _evaluate(state):
+        x_bits = state.x_bits
+        o_bits = state.o_bits
+        score = 0
+
+        for line in state.rules.win_masks:
+            xs = x_bits & line
+            os = o_bits & line
+
+            if xs and not os:
+                score += 10 ** bin(xs).count("1")
+            elif os and not xs:
+                score -= 10 ** bin(os).count("1")
+
+        return score
+
+    def _bound_flag(score, alpha, beta):
+        if score <= alpha:
+            return Engine._upper_bound
+        elif score >= beta:
+            return Engine._lower_bound
+        return Engine._exact
+
+    #determining which turn it is based on the current game state and who goes first
+    def _player(state, initial_value):
+
+        #the amount of x and o. if one is bigger than the other, put the other as the current turn
+        if state.rules is _classic_rules:
+            x = _bit_counts[state.x_bits]
+            o = _bit_counts[state.o_bits]
+        else:
+            x = bin(state.x_bits).count("1")
+            o = bin(state.o_bits).count("1")
+
+        if x < o:
+            return "X"
+        elif x > o:
+            return "O"
+        
+        #case where the number of Xs and Os are the same: the turn belongs to the one who took the initial turn
+        else:
+            return initial_value
+
+    #getting all the possible actions / moves in given state
+    def _get_actions(state):
+        if state.rules is _classic_rules:
+            return [_cell_actions[index] for index in _cell_moves[_full_mask ^ (state.x_bits | state.o_bits)]]
+
+        occupied = state.x_bits | state.o_bits
+        return [action for index, action in enumerate(state.rules.actions) if not occupied >> index & 1]
+    
+    #converting score to qualitative value: name of the winner player
+    def _get_winner(score):
+        if score == 1:
+            return "X"
+        elif score == -1:
+            return "O"
+        elif score == 0:
+            return "Draw"
+        else:
+            return None
+
+#transposition tables and move orderings of a worker process of the parallel search, kept between tasks so that every search reuses them
+_worker_tables = {}
+_worker_orderings = {}
+_worker_table_size = Engine._transposition_table_size
+_worker_cancelled_generation = None
+
+#submitted once per worker when the pool starts, see _get_pool
+def _warm_up_worker():
+    pass
+
+#run once in every worker process, with the transposition table size of the engine owning the pool and the value holding its latest cancelled generation
+def _init_worker(table_size, cancelled_generation):
+    global _worker_table_size, _worker_cancelled_generation
+    _worker_table_size = table_size
+    _worker_cancelled_generation = cancelled_generation
+
+#cancel event of a task of the given generation, set once the engine has cancelled that generation (see the parallel search documentation)
+class _WorkerCancel:
+    def __init__(self, generation):
+        self.generation = generation
+
+    def is_set(self):
+        return _worker_cancelled_generation is not None and _worker_cancelled_generation.value >= self.generation
+
+#kind: "exhaustive" or "limited", the two searches store different entries
+def _worker_table(rules, kind):
+    key = (kind, rules.length, rules.win_length)
+
+    if key not in _worker_tables:
+        _worker_tables[key] = _TranspositionTable(_worker_table_size)
+
+    return _worker_tables[key]
+
+#run by a worker of the parallel search: the alpha-beta score of the classic state after player takes the cell move, within (alpha, beta). returns (score, nodes, seconds)
+def _search_classic_root_move(x_bits, o_bits, player, move, alpha, beta, move_ordering, collect_stats):
+    start = time.perf_counter()
+    state = _Board(x_bits, o_bits)
+    stats = SearchStats() if collect_stats else None
+
+    if move_ordering not in _worker_orderings:
+        _worker_orderings[move_ordering] = _move_orderings[move_ordering]()
+    ordering = _worker_orderings[move_ordering]
+
+    if player == "X":
+        state.x_bits |= 1 << move
+        score = Engine._alpha_beta_min(state, alpha, beta, ordering, _worker_table(_classic_rules, "exhaustive"), stats, 1)[0]
+    else:
+        state.o_bits |= 1 << move
+        score = Engine._alpha_beta_max(state, alpha, beta, ordering, _worker_table(_classic_rules, "exhaustive"), stats, 1)[0]
+
+    return (score, stats.nodes if stats is not None else 0, time.perf_counter() - start)
+
+#run by a worker of the parallel search: the depth-limited score of the state after player takes the cell move, within (alpha, beta) and the given seconds
+#stopped early once the engine cancels generation. returns (score, nodes, seconds), or None when the time ran out or the search was cancelled
+def _search_limited_root_move(length, win_length, x_bits, o_bits, player, move, depth, alpha, beta, seconds, generation):
+    start = time.perf_counter()
+    rules = _get_rules(length, win_length)
+    search = _LimitedSearch(rules, start + seconds, _worker_table(rules, "limited"), _WorkerCancel(generation))
+
+    try:
+        score = Engine._limited_move_score(_Board(x_bits, o_bits, rules), player, move, depth, alpha, beta, search)
+    except _SearchTimeout:
+        return None
+
+    return (score, search.nodes, time.perf_counter() - start)
+
+#comparing how many states each search mode visits to decide the move on every state reachable within the given amount of moves from the empty grid
+#both modes are run without transposition table, so the numbers reflect the recursion itself
+def compare_search_nodes(max_moves = 2):
+    states = [_Board()]
+    frontier = list(states)
+
+    for _ in range(max_moves):
+        next_frontier = []
+        for state in frontier:
+            player = Engine._player(state, "X")
+            for action in Engine._get_actions(state):
+                projected_state = state.copy()
+                projected_state.place(action.x, action.y, player)
+                next_frontier.append(projected_state)
+        states.extend(next_frontier)
+        frontier = next_frontier
+
+    modes = [("minimax", None)] + [("alpha-beta " + name, ordering) for name, ordering in _move_orderings.items()]
+
+    print(f"{'search':<24}{'nodes':>12}{'seconds':>10}")
+    for name, ordering in modes:
+        nodes = 0
+        start = time.perf_counter()
+
+        for state in states:
+            player = Engine._player(state, "X")
+            stats = SearchStats()
+            if ordering is None:
+                search = Engine._max_value if player == "X" else Engine._min_value
+                search(state, None, stats)
+            else:
+                search = Engine._alpha_beta_max if player == "X" else Engine._alpha_beta_min
+                search(state, float("-inf"), float("inf"), ordering(), None, stats)
+            nodes += stats.nodes
+
+        print(f"{name:<24}{nodes:>12}{time.perf_counter() - start:>10.3f}")
+
+#every (state, player to move) pair reachable from the empty grid, with either player taking the first turn. terminal states are included
+def _reachable_states():
+    reached = set()
+    frontier = [(_Board(), "X"), (_Board(), "O")]
+
+    while frontier:
+        state, player = frontier.pop()
+        key = (Engine._encode_state(state), player)
+        if key in reached:
+            continue
+        reached.add(key)
+        yield (state, player)
+
+        if Engine._check_terminal_state(state)[0]:
+            continue
+
+        opponent = "O" if player == "X" else "X"
+        for action in Engine._get_actions(state):
+            projected_state = state.copy()
+            projected_state.place(action.x, action.y, player)
+            frontier.append((projected_state, opponent))
+
+#scores of every action of a non-terminal state, computed with the given transposition table or with the plain minimax when no table is given
+def _action_scores(state, player, table = None):
+    follow_up = Engine._min_value if player == "X" else Engine._max_value
+    scores = {}
+
+    for action in Engine._get_actions(state):
+        projected_state = state.copy()
+        projected_state.place(action.x, action.y, player)
+        scores[action.y * _board_length + action.x] = follow_up(projected_state, table)[0]
+
+    return scores
+
+#solving the whole game and writing the solution table read by _SolutionTable
+def build_solution_table(path = Engine._solution_table_path):
+    table = _TranspositionTable(Engine._transposition_table_size)
+    entries = [0] * (2 * 3 ** _cell_count)
+    reachable = 0
+
+    for state, player in _reachable_states():
+        game_state = Engine._check_terminal_state(state)
+        optimal_moves = 0
+
+        if game_state[0]:
+            score = Engine._adjusted_score(game_state[1], _bit_counts[state.x_bits | state.o_bits], _classic_rules)
+        else:
+            scores = _action_scores(state, player, table)
+            score = max(scores.values()) if player == "X" else min(scores.values())
+            optimal_moves = sum(1 << move for move, action_score in scores.items() if action_score == score)
+
+        #a won game ends with win score - |score| marks, a draw with a full grid
+        result = (score > 0) - (score < 0)
+        end = _win_score - abs(score) if result else _cell_count
+
+        entries[_SolutionTable._index(state, player)] = _SolutionTable._reachable_flag | end << _SolutionTable._end_shift | (result + 1) << _SolutionTable._score_shift | optimal_moves
+        reachable += 1
+
+    body = struct.pack(f"<{len(entries)}H", *entries)
+    header = _SolutionTable._header.pack(_SolutionTable._magic, _SolutionTable._version, _board_length, _SolutionTable._rules_signature(), zlib.crc32(body))
+
+    with open(path, "wb") as file:
+        file.write(header + body)
+
+    print(f"{reachable} reachable states written to {path} ({len(header) + len(body)} bytes)")
+
+#checking every entry of the solution table against the plain _max_value / _min_value results
+def verify_solution_table(path = Engine._solution_table_path):
+    solution_table = _SolutionTable(path)
+
+    if not solution_table.is_available():
+        print(f"{path} is missing or stale")
+        return False
+
+    failures = 0
+    checked = 0
+    for state, player in _reachable_states():
+        solution = solution_table.lookup(state, player)
+        game_state = Engine._check_terminal_state(state)
+
+        if game_state[0]:
+            correct = solution == (Engine._adjusted_score(game_state[1], _bit_counts[state.x_bits | state.o_bits], _classic_rules), 0)
+        else:
+            search = Engine._max_value if player == "X" else Engine._min_value
+            score, action = search(state)
+            scores = _action_scores(state, player)
+            optimal_moves = sum(1 << move for move, action_score in scores.items() if action_score == score)
+            correct = solution == (score, optimal_moves) and _cell_moves[optimal_moves][0] == action.y * _board_length + action.x
+
+        checked += 1
+        if not correct:
+            failures += 1
+
+    print(f"{checked} states checked, {failures} failures")
+    return failures == 0
+
+#checking the symmetric search against the plain minimax on every state reachable from the empty grid, with either player taking the first turn
+#the action chosen with a table must be legal (an empty cell of the actual grid) and must lead to the same score as the plain minimax decision
+def verify_symmetric_search():
+    table = _TranspositionTable(Engine._transposition_table_size)
+    alpha_beta_table = _TranspositionTable(Engine._transposition_table_size)
+    ordering = _HistoryOrdering()
+
+    states = [(state, player) for state, player in _reachable_states() if not Engine._check_terminal_state(state)[0]]
+
+    failures = 0
+    for state, player in states:
+        if player == "X":
+            expected = Engine._max_value(state)[0]
+            decisions = [Engine._max_value(state, table), Engine._alpha_beta_max(state, float("-inf"), float("inf"), ordering, alpha_beta_table)]
+        else:
+            expected = Engine._min_value(state)[0]
+            decisions = [Engine._min_value(state, table), Engine._alpha_beta_min(state, float("-inf"), float("inf"), ordering, alpha_beta_table)]
+
+        for score, action in decisions:
+            projected_state = state.copy()
+            legal = projected_state.get(action.x, action.y) is None
+            projected_state.place(action.x, action.y, player)
+            follow_up = Engine._min_value if player == "X" else Engine._max_value
+
+            if not legal or score != expected or follow_up(projected_state)[0] != expected:
+                failures += 1
+
+    print(f"{len(states)} states checked, {failures} failures, {len(table)} canonical entries in the minimax table")
+    return failures == 0
+
+#running one search from the empty grid under cProfile, then printing its statistics and the functions taking the most time. output: optional file receiving the raw pstats data
+#the solution table is left out, so that the search itself is profiled
+def profile_search(grid_length = 3, win_length = 3, search_mode = "alpha-beta", move_ordering = "history", time_budget = 1.0, output = None):
+    import cProfile
+    import pstats
+
+    engine = Engine(grid_length, win_length, search_mode, move_ordering, use_solution_table = False)
+    stats = SearchStats()
+    profiler = cProfile.Profile()
+
+    profiler.enable()
+    score, action = engine.search(engine.state.copy(), "X", time_budget, None, stats)
+    profiler.disable()
+    engine.close()
+
+    print(f"decision ({action.x}, {action.y}) with score {score}")
+    print(stats)
+    print()
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+    if output is not None:
+        profiler.dump_stats(output)
+
+def main():
+    parser = argparse.ArgumentParser(description = "Offline tools of the tic tac toe engine")
+    parser.add_argument("--compare-search", action = "store_true", help = "print the amount of states visited by each search mode")
+    parser.add_argument("--verify-symmetry", action = "store_true", help = "check the symmetric search against the plain minimax")
+    parser.add_argument("--build-table", action = "store_true", help = "solve the 3x3 game and write the solution table")
+    parser.add_argument("--verify-table", action = "store_true", help = "check the solution table against the plain minimax")
+    parser.add_argument("--profile", action = "store_true", help = "profile one search from the empty grid and print the report")
+    parser.add_argument("--profile-output", default = None, help = "file receiving the raw pstats data of --profile")
+    parser.add_argument("--grid-length", type = int, default = 3, help = "grid of the profiled search")
+    parser.add_argument("--win-length", type = int, default = None, help = "win length of the profiled search, the grid length by default")
+    parser.add_argument("--search-mode", default = "alpha-beta", choices = list(Engine._search_modes))
+    parser.add_argument("--move-ordering", default = "history", choices = list(_move_orderings))
+    parser.add_argument("--time-budget", type = float, default = 1.0, help = "seconds of the profiled search on grids other than 3x3")
+    args = parser.parse_args()
+
+    if args.compare_search:
+        compare_search_nodes()
+
+    if args.verify_symmetry and not verify_symmetric_search():
+        sys.exit(1)
+
+    if args.build_table:
+        build_solution_table()
+
+    if args.verify_table and not verify_solution_table():
+        sys.exit(1)
+
+    if args.profile:
+        win_length = args.grid_length if args.win_length is None else args.win_length
+        profile_search(args.grid_length, win_length, args.search_mode, args.move_ordering, args.time_budget, args.profile_output)
+
+if __name__ == "__main__":
+    main()
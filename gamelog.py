@@ -0,0 +1,499 @@
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+
+from engine import Engine, _Board, _get_rules
+
+'''
+Game Log Overview
+
+Finished games are appended to a binary log: a file header (magic, version, grid), then one record per game made of a 4-byte header
+(flags: first player and first agent, difficulty, result, amount of moves) followed by one byte per move, the index of the cell taken (y * length + x).
+A 3x3 game takes 4 to 13 bytes, so tens of millions of games fit in a few hundred megabytes, and the log is read as a stream, one record at a time.
+A game is identified by the offset of its record in the file. A record cut short by a crash can only be the last one: readers stop before it,
+and the next append cuts it off the log before writing, so that the records after it are read from their first byte.
+
+The index maps every position reached by the games (up to symmetry, the empty grid left out) to the games that reached it, so that
+a question like "every game the computer lost from this position" doesn't scan the log. It lives in a directory next to the log,
+spread over bucket files of (position key, game offset) pairs sorted by key, which are searched in place through a memory map.
+The key is the canonical encoding of the position (its smallest image under the 8 symmetries), or a 64-bit hash of it on grids bigger than 5x5;
+the games found under a hashed key are replayed to confirm they reached the position, so a hash collision can't return a wrong game.
+Building the index holds at most _buffer_entries pairs in memory: they are appended to a pending file of their bucket whenever the buffer fills,
+then each pending file is sorted in runs of _buffer_entries pairs, and the runs are merged with the bucket (already sorted) into a new file replacing it,
+so an update costs the games it adds plus one pass over the buckets they touch, and even the bucket of the openings, which nearly every game reaches, is never loaded whole.
+Files are replaced, never rewritten in place, and the meta file (how far the log is indexed) last: an update interrupted before it is redone from the same point
+by the next one, whose merge drops the pairs the bucket already holds, so no game is indexed twice.
+Queries stream the matching games as well, reading the log once through.
+
+Usage:
+    python gamelog.py games.log --dump
+    python gamelog.py games.log --index
+    python gamelog.py games.log --query "X../.O./..." --bot-result loss
+
+'''
+
+#one game of the log. first_agent: "Human" or "Computer", winner: "X", "O" or "Draw", moves: cell indexes in order
+class GameRecord:
+    __slots__ = ("offset", "first_player", "first_agent", "difficulty", "winner", "moves")
+
+    def __init__(self, offset, first_player, first_agent, difficulty, winner, moves):
+        self.offset = offset
+        self.first_player = first_player
+        self.first_agent = first_agent
+        self.difficulty = difficulty
+        self.winner = winner
+        self.moves = moves
+
+    #the side the computer played
+    def bot_player(self):
+        if self.first_agent == "Computer":
+            return self.first_player
+        return "O" if self.first_player == "X" else "X"
+
+    #"win", "loss" or "draw", from the computer's side
+    def bot_result(self):
+        if self.winner == "Draw":
+            return "draw"
+        return "win" if self.winner == self.bot_player() else "loss"
+
+    #the states of the game after each move, starting with the first move
+    def states(self, rules):
+        state = _Board(rules = rules)
+        players = (self.first_player, "O" if self.first_player == "X" else "X")
+
+        for turn, move in enumerate(self.moves):
+            if players[turn % 2] == "X":
+                state.x_bits |= 1 << move
+            else:
+                state.o_bits |= 1 << move
+            yield state
+
+class GameLog:
+    _magic = b"TTTL"
+    _version = 1
+    _file_header = struct.Struct("<4sHBB")
+    _record_header = struct.Struct("<BBBB")
+
+    _first_player_o_flag = 1
+    _computer_first_flag = 2
+
+    _difficulties = ("Normal", "Hard", "Impossible")
+    _winners = ("Draw", "X", "O")
+
+    #a move is one byte, and so is the amount of moves in the record header: a game of the grid can't take more than 255 moves
+    _max_grid_length = 15
+
+    #opening (or creating) the log at path for the given grid. a log holds the games of a single grid
+    def __init__(self, path, grid_length = 3, win_length = 3):
+        if grid_length > GameLog._max_grid_length:
+            raise ValueError(f"the log stores a move and the amount of moves in one byte, grids can't be longer than {GameLog._max_grid_length}")
+
+        self.path = path
+        self.rules = _get_rules(grid_length, win_length)
+
+        #where the last complete record of the log ends, found by the first append (see _complete_end)
+        self._end = None
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                header_rules = GameLog._read_file_header(file)
+
+            if header_rules is not self.rules:
+                raise ValueError(f"{path} holds games of a {header_rules.length}x{header_rules.length} grid with {header_rules.win_length} to win")
+        else:
+            with open(path, "wb") as file:
+                file.write(GameLog._file_header.pack(GameLog._magic, GameLog._version, grid_length, win_length))
+
+    #opening an existing log with the grid written in its header
+    def load(path):
+        with open(path, "rb") as file:
+            rules = GameLog._read_file_header(file)
+        return GameLog(path, rules.length, rules.win_length)
+
+    #appending a finished game, returns its offset. moves: cell indexes in order
+    #a record cut short by a crash is cut off the log first, otherwise the new record would be read as the end of the torn one
+    def append(self, first_player, first_agent, difficulty, winner, moves):
+        flags = (GameLog._first_player_o_flag if first_player == "O" else 0) | (GameLog._computer_first_flag if first_agent == "Computer" else 0)
+        difficulty_code = GameLog._difficulties.index(difficulty) if difficulty in GameLog._difficulties else 255
+        record = GameLog._record_header.pack(flags, difficulty_code, GameLog._winners.index(winner), len(moves)) + bytes(moves)
+
+        with open(self.path, "r+b") as file:
+            if self._end is None or file.seek(0, os.SEEK_END) != self._end:
+                self._end = GameLog._complete_end(file, self._end or GameLog._file_header.size)
+                file.truncate(self._end)
+
+            offset = self._end
+            file.seek(offset)
+            file.write(record)
+
+        self._end = offset + len(record)
+        return offset
+
+    #streaming every game from the given offset (a record boundary, the first game by default). the file is read through a buffer, one record at a time
+    def games(self, start = None):
+        with open(self.path, "rb") as file:
+            GameLog._read_file_header(file)
+            if start is not None:
+                file.seek(start)
+
+            while True:
+                record = GameLog._read_record(file)
+                if record is None:
+                    break
+                yield record
+
+    #the game whose record starts at offset
+    def game_at(self, offset):
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return GameLog._read_record(file)
+
+    #streaming the games whose records start at the given offsets, in the order given
+    def games_at(self, offsets):
+        with open(self.path, "rb") as file:
+            for offset in offsets:
+                file.seek(offset)
+                yield GameLog._read_record(file)
+
+    #the game number number (0 being the first one) of the log, None when the log has fewer games
+    def game_number(self, number):
+        for index, record in enumerate(self.games()):
+            if index == number:
+                return record
+        return None
+
+    def _read_file_header(file):
+        header = file.read(GameLog._file_header.size)
+
+        if len(header) != GameLog._file_header.size:
+            raise ValueError("not a game log: the file is too short")
+
+        magic, version, grid_length, win_length = GameLog._file_header.unpack(header)
+
+        if magic != GameLog._magic or version != GameLog._version:
+            raise ValueError("not a game log, or a log of another version")
+
+        return _get_rules(grid_length, win_length)
+
+    #offset where the last complete record of the file ends, hopping over the record headers from start (a record boundary)
+    def _complete_end(file, start):
+        size = file.seek(0, os.SEEK_END)
+        end = start
+
+        with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as mapped:
+            #the last byte of a record header is its amount of moves
+            while end + GameLog._record_header.size <= size and end + GameLog._record_header.size + mapped[end + 3] <= size:
+                end += GameLog._record_header.size + mapped[end + 3]
+
+        return end
+
+    def _read_record(file):
+        offset = file.tell()
+        header = file.read(GameLog._record_header.size)
+
+        if len(header) < GameLog._record_header.size:
+            return None
+
+        flags, difficulty_code, winner_code, move_count = GameLog._record_header.unpack(header)
+        moves = file.read(move_count)
+
+        #a record cut short by a crash while it was written is ignored, until the next append cuts it off
+        if len(moves) < move_count:
+            return None
+
+        return GameRecord(offset,
+                          "O" if flags & GameLog._first_player_o_flag else "X",
+                          "Computer" if flags & GameLog._computer_first_flag else "Human",
+                          GameLog._difficulties[difficulty_code] if difficulty_code < len(GameLog._difficulties) else None,
+                          GameLog._winners[winner_code],
+                          list(moves))
+
+class GameIndex:
+    _magic = b"TTTI"
+    _version = 1
+    _meta = struct.Struct("<4sHIQ")
+    _entry = struct.Struct("<QQ")
+
+    _default_buckets = 256
+
+    #(key, offset) pairs held in memory while building, before they are written to their buckets
+    _buffer_entries = 1 << 20
+
+    #the index of log, kept in the directory path (the log path with ".index" by default)
+    def __init__(self, log, path = None, buckets = _default_buckets):
+        self.log = log
+        self.path = path or log.path + ".index"
+        self._buckets = buckets
+        self._indexed_until = None
+
+        meta_path = os.path.join(self.path, "meta")
+        if os.path.exists(meta_path):
+            with open(meta_path, "rb") as file:
+                magic, version, self._buckets, self._indexed_until = GameIndex._meta.unpack(file.read(GameIndex._meta.size))
+
+            if magic != GameIndex._magic or version != GameIndex._version:
+                raise ValueError(f"{self.path} is not a game index, or an index of another version")
+
+    #indexing the games appended since the last update (every game the first time). returns the amount of games indexed
+    def update(self):
+        os.makedirs(self.path, exist_ok = True)
+        self._remove_leftovers()
+
+        buffers = [[] for _ in range(self._buckets)]
+        buffered = 0
+        touched = set()
+        game_count = 0
+        end = self._indexed_until
+
+        for record in self.log.games(self._indexed_until or None):
+            for state in record.states(self.log.rules):
+                key = GameIndex._key(state)
+                bucket = self._bucket(key)
+                buffers[bucket].append(GameIndex._entry.pack(key, record.offset))
+                touched.add(bucket)
+                buffered += 1
+
+            if buffered >= GameIndex._buffer_entries:
+                self._flush(buffers)
+                buffered = 0
+
+            game_count += 1
+            end = record.offset + GameLog._record_header.size + len(record.moves)
+
+        self._flush(buffers)
+
+        for bucket in touched:
+            self._merge_bucket(bucket)
+
+        self._indexed_until = end
+        meta_path = os.path.join(self.path, "meta")
+        with open(meta_path + ".tmp", "wb") as file:
+            file.write(GameIndex._meta.pack(GameIndex._magic, GameIndex._version, self._buckets, end or 0))
+            GameIndex._sync(file)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        return game_count
+
+    #the games that reached the state (or one of its symmetric images), in log order
+    def games_reaching(self, state):
+        key = GameIndex._key(state)
+        records = self.log.games_at(self._lookup(self._bucket(key), key))
+
+        if GameIndex._is_exact(state.rules):
+            yield from records
+            return
+
+        #a hashed key may be shared by another position, the game is replayed up to the move count of the state to check it
+        occupied = bin(state.x_bits | state.o_bits).count("1")
+        canonical = GameIndex._canonical(state)
+
+        for record in records:
+            for turn, reached in enumerate(record.states(self.log.rules)):
+                if turn + 1 == occupied:
+                    if GameIndex._canonical(reached) == canonical:
+                        yield record
+                    break
+
+    #the games that reached the state and ended with the given result for the computer ("win", "loss", "draw"), or with any result
+    def query(self, state, bot_result = None):
+        for record in self.games_reaching(state):
+            if bot_result is None or record.bot_result() == bot_result:
+                yield record
+
+    def _bucket_path(self, bucket):
+        return os.path.join(self.path, f"bucket-{bucket:04x}")
+
+    def _bucket(self, key):
+        return (key * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF) % self._buckets
+
+    #files of an update that didn't finish: pending pairs, sorted runs and replacements not yet in place. the update redoes their work
+    def _remove_leftovers(self):
+        for name in os.listdir(self.path):
+            if name.endswith((".new", ".tmp")) or ".run" in name:
+                os.remove(os.path.join(self.path, name))
+
+    def _flush(self, buffers):
+        for bucket, entries in enumerate(buffers):
+            if entries:
+                with open(self._bucket_path(bucket) + ".new", "ab") as file:
+                    file.write(b"".join(entries))
+                entries.clear()
+
+    #merging the pending pairs of one bucket into it, sorted by key (then offset): runs of _buffer_entries pending pairs are sorted in memory and written to temporary files,
+    #then merged with the bucket into a new file, which replaces the bucket once it is on disk. pairs already in the bucket are dropped
+    def _merge_bucket(self, bucket):
+        path = self._bucket_path(bucket)
+        entry = GameIndex._entry
+        run_paths = []
+
+        with open(path + ".new", "rb") as file:
+            while True:
+                data = file.read(GameIndex._buffer_entries * entry.size)
+                if not data:
+                    break
+
+                run_path = f"{path}.run{len(run_paths)}"
+                with open(run_path, "wb") as run:
+                    run.write(b"".join(entry.pack(*pair) for pair in sorted(entry.iter_unpack(data))))
+                run_paths.append(run_path)
+
+        runs = [open(run_path, "rb") for run_path in run_paths]
+        if os.path.exists(path):
+            runs.append(open(path, "rb"))
+
+        try:
+            with open(path + ".tmp", "wb") as file:
+                previous = None
+                chunk = []
+
+                for pair in heapq.merge(*(GameIndex._read_run(run) for run in runs)):
+                    if pair != previous:
+                        chunk.append(entry.pack(*pair))
+                        previous = pair
+
+                        if len(chunk) >= 4096:
+                            file.write(b"".join(chunk))
+                            chunk.clear()
+
+                file.write(b"".join(chunk))
+                GameIndex._sync(file)
+        finally:
+            for run in runs:
+                run.close()
+
+        os.replace(path + ".tmp", path)
+
+        for run_path in run_paths:
+            os.remove(run_path)
+        os.remove(path + ".new")
+
+    def _sync(file):
+        file.flush()
+        os.fsync(file.fileno())
+
+    def _read_run(run):
+        entry = GameIndex._entry
+
+        while True:
+            data = run.read(4096 * entry.size)
+            if not data:
+                break
+            yield from entry.iter_unpack(data)
+
+    #binary search of the key in the memory-mapped bucket
+    def _lookup(self, bucket, key):
+        path = self._bucket_path(bucket)
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        entry = GameIndex._entry
+
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as mapped:
+            low, high = 0, len(mapped) // entry.size
+
+            while low < high:
+                middle = (low + high) // 2
+                if entry.unpack_from(mapped, middle * entry.size)[0] < key:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            while low < len(mapped) // entry.size:
+                found_key, offset = entry.unpack_from(mapped, low * entry.size)
+                if found_key != key:
+                    break
+                yield offset
+                low += 1
+
+    #smallest encoding of the state among its images under the symmetries of the grid
+    def _canonical(state):
+        rules = state.rules
+
+        if rules.is_classic():
+            return Engine._canonicalize(state)[0]
+
+        images = []
+        for permutation in rules.symmetries:
+            x_image = o_image = 0
+            for index in range(rules.cell_count):
+                if state.x_bits >> index & 1:
+                    x_image |= 1 << permutation[index]
+                elif state.o_bits >> index & 1:
+                    o_image |= 1 << permutation[index]
+            images.append(x_image << rules.cell_count | o_image)
+
+        return min(images)
+
+    #whether the canonical encoding of the grid fits in the 64-bit key, instead of being hashed
+    def _is_exact(rules):
+        return 2 * rules.cell_count <= 64
+
+    #64-bit key of the state: its canonical encoding when it fits, a hash of it otherwise
+    def _key(state):
+        canonical = GameIndex._canonical(state)
+
+        if GameIndex._is_exact(state.rules):
+            return canonical
+
+        return int.from_bytes(hashlib.blake2b(canonical.to_bytes((2 * state.rules.cell_count + 7) // 8, "little"), digest_size = 8).digest(), "little")
+
+#state written as rows separated by "/", "." for an empty cell, e.g. "X../.O./..."
+def parse_position(text, rules):
+    rows = text.split("/")
+
+    if len(rows) != rules.length or any(len(row) != rules.length for row in rows):
+        raise ValueError(f"a position of this log is {rules.length} rows of {rules.length} cells separated by /")
+
+    state = _Board(rules = rules)
+    for y, row in enumerate(rows):
+        for x, cell in enumerate(row):
+            if cell in "XO":
+                state.place(x, y, cell)
+            elif cell != ".":
+                raise ValueError(f"unexpected cell {cell!r}, expected X, O or .")
+
+    return state
+
+def _describe(record):
+    return f"{record.offset:>10}  {record.first_agent:<8} {record.first_player}  {record.difficulty or '-':<10} {record.winner:<5} {' '.join(map(str, record.moves))}"
+
+def main():
+    parser = argparse.ArgumentParser(description = "Reading, indexing and querying a game log")
+    parser.add_argument("log", help = "game log written by tictactoe.py --log")
+    parser.add_argument("--dump", action = "store_true", help = "print every game")
+    parser.add_argument("--index", action = "store_true", help = "index the games appended since the last indexing")
+    parser.add_argument("--buckets", type = int, default = GameIndex._default_buckets, help = "bucket files of a new index")
+    parser.add_argument("--query", default = None, help = "position to look for, rows separated by /, e.g. X../.O./...")
+    parser.add_argument("--bot-result", default = None, choices = ["win", "loss", "draw"], help = "only the games the computer ended with this result")
+    args = parser.parse_args()
+
+    try:
+        log = GameLog.load(args.log)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    if args.dump:
+        for record in log.games():
+            print(_describe(record))
+
+    if args.index:
+        print(f"{GameIndex(log, buckets = args.buckets).update()} games indexed")
+
+    if args.query is not None:
+        try:
+            state = parse_position(args.query, log.rules)
+        except ValueError as error:
+            parser.error(str(error))
+
+        count = 0
+        for record in GameIndex(log).query(state, args.bot_result):
+            print(_describe(record))
+            count += 1
+        print(f"{count} games")
+
+if __name__ == "__main__":
+    main()
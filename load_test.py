@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from server import GameServer
+from tournament import _LatencyHistogram
+
+'''
+Load Test Overview
+
+Plays many games against the server (server.py) at once and measures it: a given amount of clients (TCP connections) each run several games at a time,
+the human side of every game playing random legal moves, until the requested amount of sessions has been played.
+The report gives the sessions completed per second and the percentiles of the move latency, the time between sending a move and receiving the answer of the computer.
+
+Usage:
+    python load_test.py --serve --sessions 2000 --clients 50
+    (--serve starts a server in the same process on a free port; without it, the test connects to --host and --port)
+
+'''
+
+#one TCP connection to the server. requests are sent with an id, and a reader task hands each response to the request waiting for it
+class _Client:
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._waiting = {}
+        self._request_ids = itertools.count()
+        self._reading = asyncio.ensure_future(self._read())
+
+    async def request(self, request):
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+
+        self._writer.write((json.dumps(dict(request, id = request_id)) + "\n").encode())
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._reading.cancel()
+        self._writer.close()
+
+    async def _read(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+
+            response = json.loads(line)
+            future = self._waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("the server closed the connection"))
+
+#measures shared by every game of the test
+class _LoadResults:
+    def __init__(self):
+        self.sessions = 0
+        self.moves = 0
+        self.errors = 0
+        self.latency = _LatencyHistogram()
+
+#playing games on the client until the shared session counter reaches the total
+async def _play_games(client, session_numbers, total_sessions, settings, generator, results):
+    while next(session_numbers) < total_sessions:
+        response = await client.request(dict(settings, op = "new", first = generator.choice(("human", "computer")), human = generator.choice("XO")))
+
+        if not response["ok"]:
+            results.errors += 1
+            continue
+
+        session = response["session"]
+
+        while response["ok"] and response["winner"] is None:
+            empty = [(x, y) for y, row in enumerate(response["board"]) for x, cell in enumerate(row) if cell == "."]
+            x, y = generator.choice(empty)
+
+            start = time.perf_counter()
+            response = await client.request({"op": "move", "session": session, "x": x, "y": y})
+            results.latency.add(time.perf_counter() - start)
+            results.moves += 1
+
+        if not response["ok"]:
+            results.errors += 1
+
+        await client.request({"op": "close", "session": session})
+        results.sessions += 1
+
+async def run_load_test(host, port, total_sessions = 1000, clients = 20, games_per_client = 5, settings = None, seed = 0):
+    settings = settings or {}
+    results = _LoadResults()
+    session_numbers = itertools.count()
+    generator = random.Random(seed)
+
+    connections = [_Client(*await asyncio.open_connection(host, port)) for _ in range(clients)]
+    start = time.perf_counter()
+
+    try:
+        await asyncio.gather(*(_play_games(client, session_numbers, total_sessions, settings, random.Random(generator.random()), results)
+                               for client in connections for _ in range(games_per_client)))
+    finally:
+        for client in connections:
+            await client.close()
+
+    seconds = time.perf_counter() - start
+
+    return {"sessions": results.sessions,
+            "moves": results.moves,
+            "errors": results.errors,
+            "seconds": seconds,
+            "sessions_per_second": results.sessions / seconds,
+            "p50_ms": results.latency.percentile(0.5) * 1000,
+            "p90_ms": results.latency.percentile(0.9) * 1000,
+            "p99_ms": results.latency.percentile(0.99) * 1000,
+            "max_ms": results.latency.maximum * 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description = "Load test of the tic tac toe server")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--serve", action = "store_true", help = "start a server in this process on a free port instead of connecting to --port")
+    parser.add_argument("--sessions", type = int, default = 1000, help = "games played in total")
+    parser.add_argument("--clients", type = int, default = 20, help = "connections opened at once")
+    parser.add_argument("--games-per-client", type = int, default = 5, help = "games each connection plays at once")
+    parser.add_argument("--difficulty", default = "Impossible")
+    parser.add_argument("--grid-length", type = int, default = 3)
+    parser.add_argument("--win-length", type = int, default = None, help = "the grid length by default")
+    parser.add_argument("--time-budget", type = float, default = 1.0)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--json", action = "store_true", help = "print the report as JSON")
+    args = parser.parse_args()
+
+    settings = {"difficulty": args.difficulty,
+                "grid_length": args.grid_length,
+                "win_length": args.grid_length if args.win_length is None else args.win_length,
+                "time_budget": args.time_budget}
+
+    async def run():
+        server = None
+        port = args.port
+
+        if args.serve:
+            server = GameServer()
+            port = await server.start(args.host, 0)
+
+        try:
+            return await run_load_test(args.host, port, args.sessions, args.clients, args.games_per_client, settings, args.seed)
+        finally:
+            if server is not None:
+                await server.close()
+
+    report = asyncio.run(run())
+
+    if args.json:
+        print(json.dumps(report, indent = 2))
+    else:
+        print(f"{report['sessions']} sessions, {report['moves']} moves, {report['errors']} errors in {report['seconds']:.1f} seconds: {report['sessions_per_second']:.0f} sessions/s")
+        print(f"move latency: p50 {report['p50_ms']:.2f} ms, p90 {report['p90_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+import math
+import random
+import time
+
+from engine import _get_rules
+
+'''
+Monte Carlo Tree Search Overview
+
+An alternative to the alpha-beta searches of engine.py for big grids, used by Engine(search_mode = "mcts") and "mcts-parallel".
+Instead of scoring states with an evaluation at a depth limit, the search plays many random games (playouts) from the current state,
+and grows a tree of the states it plays through, spending more playouts on the moves that win more often (UCT: the upper confidence bound of every move,
+its win rate plus an exploration term that shrinks the more it has been tried).
+
+Playouts run on the two bitmasks of the grid: the empty cells are shuffled once and taken in turn, and only the lines through the cell just taken are checked for a win.
+Results are counted for the player who made the move into each node: 1 for a win, 0.5 for a draw, 0 for a loss.
+
+A node whose game has ended is proven (won by its mover, or drawn), and proofs climb the tree: a state where the player to move has a proven winning move is a proven loss
+for the player who moved into it, and a state whose every move is proven is proven with the best of them for the player to move. Proven nodes return their result without playouts,
+and the search stops once the root is proven, which makes the endgames exact: once the moves of a state are expanded, a win in one is never missed.
+
+The tree is kept between searches: when the next search starts from a state that follows the root of the previous one (the moves played since were expanded),
+the subtree of that state becomes the new root, with every playout already spent on it. The tree holds at most _max_nodes nodes, past which playouts still run from the leaves.
+
+With root parallelization (Engine "mcts-parallel"), each task sent to a worker process grows a new tree from the same state with its own seed, and the visits and wins
+of the root moves are summed. The workers don't keep their trees between tasks: a reused tree would send back the playouts of earlier tasks too, counted twice by the sum,
+and the results would depend on which worker took which task. With an iterations limit, the same seeds give the same results.
+
+Usage:
+    python mcts.py --benchmark
+
+'''
+
+#outcome of a proven node, for the player who moved into it
+_win = 1.0
+_draw = 0.5
+_loss = 0.0
+
+#a state of the tree: reached by move (cell index) of mover (0 X, 1 O). untried: cells not expanded yet, in random order
+class _Node:
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins", "proven")
+
+    def __init__(self, move, mover, parent, untried):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.proven = None
+
+class MonteCarloTreeSearch:
+    #exploration constant of UCT, the usual sqrt(2) for results between 0 and 1
+    _exploration = math.sqrt(2)
+
+    #bound of the tree size, about 150 bytes a node
+    _max_nodes = 500000
+
+    #iterations between two checks of the clock and the cancel event
+    _clock_interval = 32
+
+    #generator: random.Random of the playouts, a new one by default
+    def __init__(self, grid_length = 3, win_length = 3, generator = None):
+        self.rules = _get_rules(grid_length, win_length)
+        self._random = generator or random.Random()
+        self._root = None
+        self._root_bits = None
+        self._node_count = 0
+
+    #growing the tree from the state (player to move: "X" or "O") for the given iterations and / or seconds (at least one of them), or until cancel (a threading.Event) is set.
+    #returns {cell: (visits, wins, proven)} for every empty cell, wins counted for player and proven None, _win, _draw or _loss for player, and the amount of iterations run
+    def search(self, state, player, iterations = None, time_budget = None, cancel = None):
+        if iterations is None and time_budget is None:
+            raise ValueError("the search needs a limit: iterations, time_budget, or both")
+
+        self._reuse(state, 0 if player == "X" else 1)
+
+        root = self._root
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        count = 0
+
+        while root.proven is None and (iterations is None or count < iterations):
+            if count % MonteCarloTreeSearch._clock_interval == 0 and count:
+                if (deadline is not None and time.perf_counter() >= deadline) or (cancel is not None and cancel.is_set()):
+                    break
+
+            self._iterate()
+            count += 1
+
+        results = {move: (0, 0.0, None) for move in root.untried}
+        for child in root.children:
+            results[child.move] = (child.visits, child.wins, child.proven)
+
+        return (results, count)
+
+    #moving the root to the state when it follows the root of the previous search through expanded moves, starting a new tree otherwise
+    def _reuse(self, state, player):
+        target = (state.x_bits, state.o_bits)
+        node = self._root
+
+        if node is not None:
+            bits = list(self._root_bits)
+            to_move = node.mover ^ 1
+
+            while node is not None and tuple(bits) != target:
+                #the next move must be a cell the player to move holds in the state
+                if bits[to_move] & ~target[to_move] or bits[to_move ^ 1] & ~target[to_move ^ 1]:
+                    node = None
+                    break
+
+                new_cells = target[to_move] & ~bits[to_move]
+                node = next((child for child in node.children if new_cells >> child.move & 1), None)
+
+                if node is not None:
+                    bits[to_move] |= 1 << node.move
+                    to_move ^= 1
+
+            if node is not None and node.mover == player ^ 1:
+                node.parent = None
+                self._root = node
+                self._root_bits = target
+                self._node_count = node.visits + 1
+                return
+
+        occupied = state.x_bits | state.o_bits
+        untried = [index for index in range(self.rules.cell_count) if not occupied >> index & 1]
+        self._random.shuffle(untried)
+
+        self._root = _Node(None, player ^ 1, None, untried)
+        self._root_bits = target
+        self._node_count = 1
+
+    #one iteration: selection down the tree with UCT, expansion of one move, a playout, and the backpropagation of its result
+    def _iterate(self):
+        rules = self.rules
+        node = self._root
+        bits = list(self._root_bits)
+
+        #selection
+        while not node.untried and node.children and node.proven is None:
+            node = MonteCarloTreeSearch._select(node)
+            bits[node.mover] |= 1 << node.move
+
+        #expansion
+        if node.proven is None and node.untried and self._node_count < MonteCarloTreeSearch._max_nodes:
+            move = node.untried.pop()
+            mover = node.mover ^ 1
+            bits[mover] |= 1 << move
+
+            occupied = bits[0] | bits[1]
+            child = _Node(move, mover, node, None)
+
+            if any(bits[mover] & line == line for line in rules.cell_lines[move]):
+                child.proven = _win
+                child.untried = []
+            elif occupied == rules.full_mask:
+                child.proven = _draw
+                child.untried = []
+            else:
+                child.untried = [index for index in range(rules.cell_count) if not occupied >> index & 1]
+                self._random.shuffle(child.untried)
+
+            node.children.append(child)
+            self._node_count += 1
+            node = child
+
+            if child.proven is not None:
+                MonteCarloTreeSearch._prove(child)
+
+        #simulation: the result for the mover of the node, read from its proof or played out
+        if node.proven is not None:
+            winner = node.mover if node.proven == _win else node.mover ^ 1 if node.proven == _loss else None
+        else:
+            winner = self._playout(bits, node.mover ^ 1)
+
+        #backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.mover:
+                node.wins += 1.0
+            node = node.parent
+
+    def _select(node):
+        log_visits = math.log(node.visits)
+        exploration = MonteCarloTreeSearch._exploration
+        best = None
+        best_value = -1.0
+
+        for child in node.children:
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best = child
+                best_value = value
+
+        return best
+
+    #a random game from the grid (bits of X and O) with player (0 X, 1 O) to move. returns the winner, None for a draw
+    def _playout(self, bits, player):
+        rules = self.rules
+        cell_lines = rules.cell_lines
+        occupied = bits[0] | bits[1]
+        empty = [index for index in range(rules.cell_count) if not occupied >> index & 1]
+        self._random.shuffle(empty)
+        marks = [bits[0], bits[1]]
+
+        for index in empty:
+            marks[player] |= 1 << index
+            mine = marks[player]
+
+            for line in cell_lines[index]:
+                if mine & line == line:
+                    return player
+
+            player ^= 1
+
+        return None
+
+    #climbing from a node that has just been proven, proving its ancestors when the proof decides them
+    def _prove(node):
+        parent = node.parent
+
+        while parent is not None and parent.proven is None:
+            #the player to move in parent wins by moving to node: parent is lost for its mover
+            if node.proven == _win:
+                parent.proven = _loss
+            elif not parent.untried and all(child.proven is not None for child in parent.children):
+                parent.proven = _win if all(child.proven == _loss for child in parent.children) else _draw
+            else:
+                break
+
+            node = parent
+            parent = node.parent
+
+#run by a worker of the root parallelization: the root moves of a new tree grown with the seed, stopped early once the engine cancels generation.
+#returns (results, iterations) as MonteCarloTreeSearch.search
+def _search_root(length, win_length, x_bits, o_bits, player, iterations, seconds, seed, generation):
+    from engine import _WorkerCancel
+
+    search = MonteCarloTreeSearch(length, win_length, random.Random(seed))
+    state = _WorkerState(x_bits, o_bits, search.rules)
+    return search.search(state, player, iterations, seconds, _WorkerCancel(generation))
+
+#the part of a board the search reads, rebuilt in the worker from the bits sent with the task
+class _WorkerState:
+    __slots__ = ("x_bits", "o_bits", "rules")
+
+    def __init__(self, x_bits, o_bits, rules):
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.rules = rules
+
+#MCTS against the alpha-beta search, as tournaments between "Impossible:mcts" and "Impossible:alpha-beta" agents:
+#on the classic grid at a high budget (where the alpha-beta agent plays perfectly and MCTS must never lose), then on bigger grids at every budget,
+#the win / draw / loss rates of MCTS at each budget telling its strength per millisecond. the alpha-beta agent searches the 3x3 grid too instead of reading the solution table,
+#so that the latencies compare two searches. returns the rows printed
+def benchmark_mcts(games = 20, budgets = (0.01, 0.05, 0.2), grids = ((4, 4), (5, 4)), classic_budget = 0.5, classic_games = 50, workers = None, seed = 0):
+    from tournament import run_tournament
+
+    agents = ["Impossible:mcts", "Impossible:alpha-beta"]
+    settings = [(3, 3, classic_budget, classic_games)] + [(length, win_length, budget, games) for length, win_length in grids for budget in budgets]
+    rows = []
+
+    print(f"{'grid':<10}{'budget ms':>10}{'games':>7}{'mcts win':>10}{'draw':>8}{'loss':>8}{'mcts p50 ms':>13}{'ab p50 ms':>11}")
+    for length, win_length, budget, game_count in settings:
+        summary = run_tournament(agents, game_count, None, workers, max(1, game_count // 4), seed, length, win_length, budget, use_solution_table = False)
+        mcts = summary["agents"][agents[0]]
+        alpha_beta = summary["agents"][agents[1]]
+
+        row = {"grid": f"{length}x{length} win {win_length}",
+               "budget_ms": budget * 1000,
+               "games": summary["games"],
+               "win_rate": mcts["win_rate"],
+               "draw_rate": mcts["draw_rate"],
+               "loss_rate": mcts["loss_rate"],
+               "mcts_p50_ms": mcts["p50_ms"],
+               "alpha_beta_p50_ms": alpha_beta["p50_ms"]}
+        rows.append(row)
+
+        print(f"{length}x{length}/{win_length:<6}{row['budget_ms']:>10.0f}{row['games']:>7}{row['win_rate']:>10.1%}{row['draw_rate']:>8.1%}{row['loss_rate']:>8.1%}"
+              f"{row['mcts_p50_ms']:>13.2f}{row['alpha_beta_p50_ms']:>11.2f}")
+
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description = "Monte Carlo tree search for the tic tac toe engine")
+    parser.add_argument("--benchmark", action = "store_true", help = "play MCTS against the alpha-beta search on 3x3, 4x4 and 5x5")
+    parser.add_argument("--games", type = int, default = 20, help = "games per pair of agents on the bigger grids")
+    parser.add_argument("--classic-games", type = int, default = 50, help = "games per pair of agents on 3x3")
+    parser.add_argument("--budgets", type = float, nargs = "+", default = [0.01, 0.05, 0.2], help = "seconds per move on the bigger grids")
+    parser.add_argument("--classic-budget", type = float, default = 0.5, help = "seconds per move on 3x3")
+    parser.add_argument("--workers", type = int, default = None, help = "processes playing the games, the amount of cores by default")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_mcts(args.games, args.budgets, classic_budget = args.classic_budget, classic_games = args.classic_games, workers = args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import Engine
+
+'''
+Server Overview
+
+Serves the computer player to many clients at once: an asyncio TCP server where every client can hold any amount of independent game sessions,
+each with its own engine (and so its own game state), grid, first turn, and difficulty. Sessions end when the client closes them or disconnects.
+
+The protocol is line-delimited JSON: every request is one JSON object on one line, answered by one JSON object on one line carrying the same "id".
+Requests of one connection are handled concurrently (a slow search doesn't hold the other sessions of the client back), the requests of one session in order.
+The engine calls run on a thread pool, so that a search never blocks the event loop.
+
+Requests:
+    {"id": 1, "op": "new", "human": "X", "first": "human", "difficulty": "Impossible", "grid_length": 3, "win_length": 3, "time_budget": 1.0, "difficulty_mode": "random", "tie_break": "natural"}
+        starts a session (every field but "op" is optional, the values above are the defaults, the win length defaulting to the grid length).
+        the time budget is capped at GameServer._max_time_budget seconds, and the tie break defaults to "center" on grids bigger than 3x3
+        when the computer takes the first turn, its move is in the response
+    {"id": 2, "op": "move", "session": 0, "x": 1, "y": 1}
+        plays the human move, then the computer's answer unless the game has ended
+    {"id": 3, "op": "state", "session": 0}
+    {"id": 4, "op": "close", "session": 0}
+
+Responses:
+    {"id": 2, "ok": true, "session": 0, "board": ["X..", ".O.", "..."], "computer_move": {"x": 1, "y": 1}, "player": "X", "winner": null}
+        board rows from top to bottom, "." for an empty cell. computer_move is null when the computer didn't move, player is null once the game has ended,
+        winner is "X", "O" or "Draw" once it has
+    {"id": 2, "ok": false, "error": "..."}
+
+Usage:
+    python server.py --port 8765
+
+'''
+
+#one game of a client: the engine holding its state, and the settings of the computer. the lock keeps the requests of the session in order
+class _Session:
+    def __init__(self, engine, human, difficulty, time_budget):
+        self.engine = engine
+        self.human = human
+        self.difficulty = difficulty
+        self.time_budget = time_budget
+        self.lock = asyncio.Lock()
+
+#raised by a request handler when the request can't be served, its message goes back to the client
+class _RequestError(Exception):
+    pass
+
+class GameServer:
+    _default_max_sessions = 10000
+
+    #bigger grids are refused, their rules and searches cost too much to be offered to anyone who connects
+    _max_grid_length = 15
+
+    #seconds a search of a session may take at most, longer time budgets are lowered to it so that a few clients can't hold every search thread
+    _max_time_budget = 10.0
+
+    #workers: threads running the engine calls. max_sessions: sessions open at once over every client
+    def __init__(self, workers = None, max_sessions = _default_max_sessions):
+        self._executor = ThreadPoolExecutor(max_workers = workers)
+        self._max_sessions = max_sessions
+        self._sessions = {}
+        self._session_ids = itertools.count()
+        self._server = None
+        self._connections = {}
+
+    async def start(self, host = "127.0.0.1", port = 8765):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    #stopping the server: no more connections are accepted, the open ones are closed, and their handlers are waited for
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions = True)
+
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._executor.shutdown(wait = False, cancel_futures = True)
+
+    def session_count(self):
+        return len(self._sessions)
+
+    async def _handle_connection(self, reader, writer):
+        owned = set()
+        write_lock = asyncio.Lock()
+        tasks = set()
+        self._connections[asyncio.current_task()] = writer
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                task = asyncio.ensure_future(self._serve_line(line, owned, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for session_id in owned:
+                self._sessions.pop(session_id, None)
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def _serve_line(self, line, owned, writer, write_lock):
+        request_id = None
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise _RequestError("a request must be a JSON object")
+            request_id = request.get("id")
+            response = await self._handle_request(request, owned)
+        except json.JSONDecodeError:
+            response = {"ok": False, "error": "the request is not valid JSON"}
+        except _RequestError as error:
+            response = {"ok": False, "error": str(error)}
+        except Exception as error:
+            response = {"ok": False, "error": f"internal error: {error!r}"}
+
+        response["id"] = request_id
+
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _handle_request(self, request, owned):
+        op = request.get("op")
+
+        if op == "new":
+            return await self._new_session(request, owned)
+
+        session_id = request.get("session")
+        if session_id not in owned:
+            raise _RequestError(f"unknown session {session_id!r}")
+        session = self._sessions[session_id]
+
+        async with session.lock:
+            #the session may have been closed while this request waited for it
+            if session_id not in owned:
+                raise _RequestError(f"unknown session {session_id!r}")
+
+            if op == "move":
+                return await self._play(session_id, session, request)
+            elif op == "state":
+                return GameServer._describe(session_id, session, None)
+            elif op == "close":
+                del self._sessions[session_id]
+                owned.discard(session_id)
+                return {"ok": True, "session": session_id}
+
+        raise _RequestError(f"unknown op {op!r}")
+
+    async def _new_session(self, request, owned):
+        if len(self._sessions) >= self._max_sessions:
+            raise _RequestError("too many sessions")
+
+        human = request.get("human", "X")
+        first = request.get("first", "human")
+        difficulty = request.get("difficulty", "Impossible")
+
+        if human not in ("X", "O") or first not in ("human", "computer") or difficulty not in Engine._random_move_chances:
+            raise _RequestError("human must be X or O, first human or computer, difficulty one of " + ", ".join(Engine._random_move_chances))
+
+        try:
+            grid_length = int(request.get("grid_length", 3))
+            if not 1 <= grid_length <= GameServer._max_grid_length:
+                raise ValueError(f"grid length must be between 1 and {GameServer._max_grid_length}")
+
+            engine = Engine(grid_length, int(request.get("win_length", grid_length)), difficulty_mode = request.get("difficulty_mode", "random"), tie_break = request.get("tie_break"))
+            time_budget = float(request.get("time_budget", 1.0))
+            if not math.isfinite(time_budget) or time_budget <= 0:
+                raise ValueError(f"time budget must be a positive number of seconds, got {time_budget}")
+            time_budget = min(time_budget, GameServer._max_time_budget)
+        except (TypeError, ValueError) as error:
+            raise _RequestError(str(error))
+
+        computer = "O" if human == "X" else "X"
+        engine.new_game(human if first == "human" else computer)
+
+        session_id = next(self._session_ids)
+        session = _Session(engine, human, difficulty, time_budget)
+        self._sessions[session_id] = session
+        owned.add(session_id)
+
+        async with session.lock:
+            computer_move = await self._move_computer(session) if first == "computer" else None
+            return GameServer._describe(session_id, session, computer_move)
+
+    #the human move, then the computer's answer
+    async def _play(self, session_id, session, request):
+        engine = session.engine
+
+        if engine.is_terminal():
+            raise _RequestError("the game has already ended")
+
+        try:
+            engine.apply(int(request["x"]), int(request["y"]))
+        except (KeyError, TypeError, ValueError) as error:
+            raise _RequestError(f"invalid move: {error}")
+
+        computer_move = None if engine.is_terminal() else await self._move_computer(session)
+        return GameServer._describe(session_id, session, computer_move)
+
+    #searching on the thread pool, then applying the decision back on the event loop
+    async def _move_computer(self, session):
+        engine = session.engine
+        loop = asyncio.get_running_loop()
+        action = await loop.run_in_executor(self._executor, engine.best_move, session.difficulty, session.time_budget)
+        engine.apply(action.x, action.y)
+        return {"x": action.x, "y": action.y}
+
+    def _describe(session_id, session, computer_move):
+        engine = session.engine
+        length = engine.rules.length
+        board = ["".join(engine.state.get(x, y) or "." for x in range(length)) for y in range(length)]
+        terminal = engine.is_terminal()
+
+        return {"ok": True,
+                "session": session_id,
+                "board": board,
+                "computer_move": computer_move,
+                "player": None if terminal else engine.player(),
+                "winner": engine.winner()}
+
+def main():
+    parser = argparse.ArgumentParser(description = "Tic tac toe server speaking line-delimited JSON over TCP")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--workers", type = int, default = None, help = "threads running the searches")
+    parser.add_argument("--max-sessions", type = int, default = GameServer._default_max_sessions)
+    args = parser.parse_args()
+
+    async def run():
+        server = GameServer(args.workers, args.max_sessions)
+        port = await server.start(args.host, args.port)
+        print(f"serving on {args.host}:{port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import pytest
+
+from engine import Engine, _reachable_states, build_solution_table, verify_solution_table, verify_symmetric_search
+
+#the symmetric transposition table and the alpha-beta search against the plain minimax, on every reachable state
+def test_symmetric_search():
+    assert verify_symmetric_search()
+
+def test_solution_table(tmp_path):
+    path = str(tmp_path / "tictactoe.table")
+    build_solution_table(path)
+    assert verify_solution_table(path)
+
+#every search mode of the engine scores the state like the plain minimax and plays an action of that score
+def test_search_modes_match_minimax():
+    states = [(state, player) for state, player in _reachable_states() if not Engine._check_terminal_state(state)[0]][::25]
+    engines = [Engine(search_mode = mode, move_ordering = ordering, use_solution_table = False)
+               for mode, ordering in (("alpha-beta", "natural"), ("alpha-beta", "positional"), ("alpha-beta", "history"))]
+
+    for state, player in states:
+        expected = Engine._max_value(state)[0] if player == "X" else Engine._min_value(state)[0]
+
+        for engine in engines:
+            score, action = engine.search(state.copy(), player)
+            ranking = engine.rank_moves(state.copy(), player)
+
+            assert score == expected
+            assert state.get(action.x, action.y) is None
+            assert ranking[0][0] == expected
+
+#a depth-limited search running out of time unwinds from deep in the tree, and must take back every mark it placed on the state it was given
+def test_timed_out_search_leaves_the_state():
+    for grid_length, win_length in ((5, 4), (6, 4), (7, 5)):
+        engine = Engine(grid_length, win_length)
+        engine.apply(grid_length // 2, grid_length // 2)
+        state = engine.state
+        x_bits, o_bits = state.x_bits, state.o_bits
+
+        engine.search(state, "O", 0.05)
+        engine.rank_moves(state, "O", 0.05)
+
+        assert (state.x_bits, state.o_bits) == (x_bits, o_bits)
+
+def test_unknown_difficulty():
+    with pytest.raises(ValueError, match = "Normal, Hard, Impossible"):
+        Engine().best_move("Expert")
+
+#the NumPy batch evaluator of batch.py against the checks of the engine, skipped where NumPy isn't installed (the game itself doesn't need it)
+def test_batch_evaluator():
+    pytest.importorskip("numpy")
+    from batch import verify_batch_evaluator
+
+    assert verify_batch_evaluator(random_positions = 5000)
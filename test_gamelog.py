@@ -0,0 +1,135 @@
+import os
+import random
+
+import pytest
+
+from engine import Engine
+from gamelog import GameIndex, GameLog
+
+#the longest game of the biggest grid fills every cell, 225 moves counted in one byte
+def test_biggest_grid(tmp_path):
+    log = GameLog(str(tmp_path / "games.log"), GameLog._max_grid_length, 5)
+    moves = list(range(GameLog._max_grid_length ** 2))
+    offset = log.append("X", "Human", "Hard", "Draw", moves)
+
+    assert log.game_at(offset).moves == moves
+
+    with pytest.raises(ValueError):
+        GameLog(str(tmp_path / "bigger.log"), GameLog._max_grid_length + 1, 5)
+
+#a record torn by a crash is cut off by the next append, and every record after it reads back whole
+def test_torn_record(tmp_path):
+    path = str(tmp_path / "games.log")
+    first = ("X", "Human", "Normal", "X", [0, 3, 1, 4, 2])
+    second = ("O", "Computer", "Impossible", "Draw", [4, 0, 8, 2, 1, 7, 6, 3, 5])
+    torn = GameLog._record_header.pack(0, 0, 0, 9) + bytes([4, 0])
+
+    GameLog(path).append(*first)
+    size = os.path.getsize(path)
+    with open(path, "ab") as file:
+        file.write(torn)
+
+    #readers stop before the torn record, a log opened later cuts it off
+    log = GameLog.load(path)
+    assert [record.moves for record in log.games()] == [first[4]]
+    assert log.append(*second) == size
+    assert [record.moves for record in log.games()] == [first[4], second[4]]
+
+    #records written by someone else since the last append are kept, a torn one after them cut off
+    with open(path, "ab") as file:
+        file.write(GameLog._record_header.pack(0, 0, 0, 5) + bytes(first[4]) + torn)
+
+    log.append(*second)
+    assert [record.moves for record in log.games()] == [first[4], second[4], first[4], second[4]]
+    assert os.path.getsize(path) == GameLog._file_header.size + 2 * (8 + 5 + 9)
+
+#count random games of the grid appended to log, each side playing a random legal move
+def append_random_games(log, count, generator):
+    engine = Engine(log.rules.length, log.rules.win_length)
+
+    for _ in range(count):
+        first_player = generator.choice("XO")
+        engine.new_game(first_player)
+        while not engine.is_terminal():
+            action = generator.choice(engine.legal_moves())
+            engine.apply(action.x, action.y)
+        log.append(first_player, generator.choice(("Human", "Computer")), "Hard", engine.winner(), engine.moves)
+
+#the index against a scan of the whole log, on every position the games reached: the same games, each one once
+def check_index(index):
+    expected = {}
+    states = {}
+    for record in index.log.games():
+        for state in record.states(index.log.rules):
+            canonical = GameIndex._canonical(state)
+            expected.setdefault(canonical, set()).add(record.offset)
+            states.setdefault(canonical, state.copy())
+
+    for canonical, state in states.items():
+        offsets = [record.offset for record in index.games_reaching(state)]
+        assert sorted(offsets) == sorted(expected[canonical])
+
+def index_files(index):
+    files = {}
+    for name in sorted(os.listdir(index.path)):
+        with open(os.path.join(index.path, name), "rb") as file:
+            files[name] = file.read()
+    return files
+
+#3x3 and 4x4 keys are canonical encodings, 6x6 keys hashes of them. few buckets and a small buffer, so that the buckets hold several runs
+@pytest.mark.parametrize("grid_length, win_length", [(3, 3), (4, 3), (6, 4)])
+def test_index(tmp_path, monkeypatch, grid_length, win_length):
+    monkeypatch.setattr(GameIndex, "_buffer_entries", 64)
+    generator = random.Random(grid_length)
+    log = GameLog(str(tmp_path / "games.log"), grid_length, win_length)
+
+    append_random_games(log, 150, generator)
+    index = GameIndex(log, buckets = 4)
+    assert index.update() == 150
+    check_index(index)
+
+    #an update indexes the games appended since the previous one, and only them
+    append_random_games(log, 50, generator)
+    assert GameIndex(log).update() == 50
+    check_index(GameIndex(log))
+    assert GameIndex(log).update() == 0
+
+#an update interrupted before the meta file is redone from the same point, leaving the buckets as one that went through
+def test_repeated_update(tmp_path, monkeypatch):
+    monkeypatch.setattr(GameIndex, "_buffer_entries", 64)
+    generator = random.Random(0)
+    log = GameLog(str(tmp_path / "games.log"))
+    append_random_games(log, 100, generator)
+    GameIndex(log, buckets = 4).update()
+
+    meta_path = os.path.join(str(tmp_path / "games.log.index"), "meta")
+    with open(meta_path, "rb") as file:
+        meta = file.read()
+
+    append_random_games(log, 100, generator)
+    GameIndex(log).update()
+    files = index_files(GameIndex(log))
+
+    with open(meta_path, "wb") as file:
+        file.write(meta)
+    assert GameIndex(log).update() == 100
+
+    assert index_files(GameIndex(log)) == files
+    check_index(GameIndex(log))
+
+#the pending pairs, runs and replacements left by an update that crashed are removed by the next one, without reaching the buckets
+def test_leftovers_removed(tmp_path):
+    log = GameLog(str(tmp_path / "games.log"))
+    append_random_games(log, 50, random.Random(0))
+    index = GameIndex(log, buckets = 4)
+    index.update()
+    files = index_files(index)
+
+    leftovers = ["bucket-0000.new", "bucket-0001.run0", "bucket-0002.tmp", "meta.tmp"]
+    for name in leftovers:
+        with open(os.path.join(index.path, name), "wb") as file:
+            file.write(GameIndex._entry.pack(1, 2) * 10)
+
+    assert GameIndex(log).update() == 0
+    assert index_files(GameIndex(log)) == files
+    check_index(GameIndex(log))
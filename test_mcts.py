@@ -0,0 +1,67 @@
+import random
+
+from engine import Engine, _Board
+from mcts import MonteCarloTreeSearch, _win
+
+#5x5 grid, 4 in a row: X holds three cells of the top row, (3, 0) completes it
+opening = [(0, 0), (0, 4), (1, 0), (4, 4), (2, 0)]
+
+def play(engine, moves):
+    for x, y in moves:
+        engine.apply(x, y)
+    return engine
+
+def test_win_in_one():
+    engine = play(Engine(5, 4, search_mode = "mcts", seed = 0, iterations = 2000), opening + [(2, 2)])
+    action = engine.best_move("Impossible", time_budget = 60)
+    assert (action.x, action.y) == (3, 0)
+
+    #the win is proven, not only the most visited move
+    results = MonteCarloTreeSearch(5, 4, random.Random(0)).search(engine.state, "X", iterations = 2000)[0]
+    assert results[3][2] == _win
+
+def test_block_in_one():
+    engine = play(Engine(5, 4, search_mode = "mcts", seed = 0, iterations = 5000), opening)
+    action = engine.best_move("Impossible", time_budget = 60)
+    assert (action.x, action.y) == (3, 0)
+
+#the next search keeps the subtree of the moves played since the previous one, and starts a new tree from any other state
+def test_reuse():
+    search = MonteCarloTreeSearch(5, 4, random.Random(0))
+    state = _Board(rules = search.rules)
+    search.search(state, "X", iterations = 3000)
+
+    child = max(search._root.children, key = lambda node: node.visits)
+    grandchild = max(child.children, key = lambda node: node.visits)
+    visits = grandchild.visits
+    state.x_bits |= 1 << child.move
+    state.o_bits |= 1 << grandchild.move
+
+    results, count = search.search(state, "X", iterations = 100)
+    assert search._root is grandchild and grandchild.parent is None
+    assert grandchild.visits == visits + count
+    assert sum(result[0] for result in results.values()) == grandchild.visits - 1
+
+    #a state that doesn't follow the root (O took another cell): a new tree
+    state.o_bits = 1 << next(index for index in range(search.rules.cell_count) if not (state.x_bits | state.o_bits) >> index & 1)
+    search.search(state, "X", iterations = 100)
+    assert search._root.move is None and search._root.visits == 100
+
+    #the same bits with the other player to move: a new tree as well
+    root = search._root
+    search.search(state, "O", iterations = 100)
+    assert search._root is not root
+
+#with an iterations limit, the same seed gives the same root results however the workers share the tasks
+def test_parallel_is_deterministic():
+    rankings = []
+
+    for _ in range(2):
+        engine = play(Engine(5, 4, search_mode = "mcts-parallel", seed = 1, workers = 2, iterations = 1000), opening[:2])
+        try:
+            rankings.append(engine.rank_moves(engine.state.copy(), engine.player(), time_budget = 60))
+        finally:
+            engine.close()
+
+    assert rankings[0] == rankings[1]
+    assert len(rankings[0]) == 23 and len({score for score, _ in rankings[0]}) > 1
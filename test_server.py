@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+from server import GameServer
+
+#running test(server, request, writer) against a server on a free port, with one client connection to it (writer its stream)
+#request(line) sends one request (a dict, or a raw line of text) and returns the decoded response
+def run_client(test):
+    async def run():
+        server = GameServer()
+        port = await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        async def request(line):
+            writer.write((line if isinstance(line, str) else json.dumps(line)).encode() + b"\n")
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        try:
+            await test(server, request, writer)
+        finally:
+            writer.close()
+            await server.close()
+
+    asyncio.run(run())
+
+def test_session():
+    async def test(server, request, writer):
+        response = await request({"id": 1, "op": "new", "human": "X", "first": "human"})
+        assert response["ok"] and response["id"] == 1
+        assert response["board"] == ["...", "...", "..."] and response["computer_move"] is None and response["player"] == "X"
+        session = response["session"]
+
+        #the human move and the computer's answer
+        response = await request({"id": 2, "op": "move", "session": session, "x": 0, "y": 0})
+        assert response["ok"] and response["id"] == 2
+        move = response["computer_move"]
+        assert response["board"][0][0] == "X" and response["board"][move["y"]][move["x"]] == "O"
+        assert response["player"] == "X" and response["winner"] is None
+
+        response = await request({"id": 3, "op": "state", "session": session})
+        assert response["ok"] and response["computer_move"] is None
+        assert sum(row.count(".") for row in response["board"]) == 7
+
+        #an occupied cell
+        response = await request({"id": 4, "op": "move", "session": session, "x": 0, "y": 0})
+        assert not response["ok"] and response["id"] == 4
+
+        response = await request({"id": 5, "op": "close", "session": session})
+        assert response == {"ok": True, "session": session, "id": 5}
+        assert server.session_count() == 0
+
+        response = await request({"id": 6, "op": "state", "session": session})
+        assert not response["ok"] and "unknown session" in response["error"]
+
+    run_client(test)
+
+#the computer taking the first turn answers the new request with its move
+def test_computer_first():
+    async def test(server, request, writer):
+        response = await request({"id": 1, "op": "new", "human": "O", "first": "computer"})
+        move = response["computer_move"]
+        assert response["ok"] and response["board"][move["y"]][move["x"]] == "X" and response["player"] == "O"
+
+    run_client(test)
+
+def test_invalid_requests():
+    async def test(server, request, writer):
+        response = await request("{not json")
+        assert response == {"ok": False, "error": "the request is not valid JSON", "id": None}
+
+        response = await request("[1, 2]")
+        assert not response["ok"] and response["id"] is None
+
+        response = await request({"id": 1, "op": "state", "session": 12345})
+        assert not response["ok"] and response["id"] == 1 and "unknown session" in response["error"]
+
+        response = await request({"id": 2, "op": "new", "difficulty": "Expert"})
+        assert not response["ok"] and "difficulty" in response["error"]
+
+        response = await request({"id": 3, "op": "new", "grid_length": GameServer._max_grid_length + 1})
+        assert not response["ok"] and "grid length" in response["error"]
+
+        #the connection keeps serving after errors
+        response = await request({"id": 4, "op": "new"})
+        assert response["ok"]
+
+    run_client(test)
+
+#sessions of another connection are unknown to this one
+def test_sessions_belong_to_their_connection():
+    async def test(server, request, writer):
+        session = (await request({"id": 1, "op": "new"}))["session"]
+        port = server._server.sockets[0].getsockname()[1]
+        other_reader, other_writer = await asyncio.open_connection("127.0.0.1", port)
+
+        other_writer.write(json.dumps({"id": 1, "op": "state", "session": session}).encode() + b"\n")
+        await other_writer.drain()
+        response = json.loads(await other_reader.readline())
+        assert not response["ok"] and "unknown session" in response["error"]
+
+        other_writer.close()
+
+    run_client(test)
+
+def test_time_budget():
+    async def test(server, request, writer):
+        #JSON has no NaN or infinity, but Python's json module reads them
+        for budget in ("NaN", "Infinity", "-Infinity", "0", "-1", "\"fast\""):
+            response = await request(f'{{"id": 1, "op": "new", "time_budget": {budget}}}')
+            assert not response["ok"] and response["id"] == 1, budget
+
+        response = await request({"id": 2, "op": "new", "time_budget": 1e9})
+        assert response["ok"]
+        assert server._sessions[response["session"]].time_budget == GameServer._max_time_budget
+        assert server.session_count() == 1
+
+    run_client(test)
+
+def test_sessions_removed_on_disconnect():
+    async def test(server, request, writer):
+        for request_id in range(3):
+            assert (await request({"id": request_id, "op": "new"}))["ok"]
+        assert server.session_count() == 3
+
+        writer.close()
+        await writer.wait_closed()
+
+        for _ in range(100):
+            if server.session_count() == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        assert server.session_count() == 0
+
+    run_client(test)
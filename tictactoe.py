@@ -1,18 +1,32 @@
 import tkinter as tk
+import argparse
+import threading
+import queue
 import random
+import time
+
+from engine import Engine, SearchStats
+from gamelog import GameLog
 
 '''
 General Overview
 
 Creating basic tic tac toe game using toolkit interface through creating grid consisting of 9 buttons that mimics tic tac toe's button.
-Each button has its 2 dimensional index that corresponds to 2D list that holds the value of each cell (X, O, or None). 
+Each button has its 2 dimensional index that corresponds to a cell of the game state, kept by the engine (engine.py) which holds one bitmask of the occupied cells for each player (X and O). 
 By the time the player press the button, the program will determine which turn is it and "populate" the grid with X or O, depending on the turn.
 After pressing the button, the program will check whether the state (the game) is on terminal state (state where the game has ended) and determine the winner.
-The check of terminal state is done by checking the 2D list, whether there are 3-straight Xs or Os, or all the cell has been populated.
+The check of terminal state is done by checking the bitmasks, whether there are 3-straight Xs or Os, or all the cell has been populated.
 
 The opponent of the game is a computer. The computer will decide the move by implementing minimax algorithm. Essentially, the computer will put itself on
 the opponent shoes recursively, as if it overlooked on every move possibilities and decide the one that guarantee the computer to win or at least draw
 
+The game logic lives in engine.py, which doesn't depend on tkinter; this module is the view: it shows the engine's state and forwards the clicks to it.
+
+Finished games can be appended to a game log (gamelog.py) with --log, and a game of a log replayed on the grid with --replay and --game.
+
+The grid is drawn by one of two renderers: a button for each cell (the original look), or a single canvas where a click is mapped to its cell,
+which only draws the cells that change and stays responsive on big grids (15x15). The time the grid takes to redraw is measured at every move.
+
 '''
 
 #class for each cell in the grid for ease in adressing the cells by its index and storing X or O value
@@ -39,28 +53,164 @@ class _Cell(tk.Button):
         self._is_filled = False
         self.config(text = "")
 
-#"action" refers to what move is done (consisting of indexes of the move in the grid)
-class _Action:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+#grid made of a button for each cell. the cells are only configured when their state actually changes: enabling an enabled grid does nothing,
+#and clearing only touches the filled cells
+class _ButtonBoard:
+    def __init__(self, master, length, on_click, cell_length, font_size):
+        self._cells = []
+        self._filled = []
+        self._enabled = True
+
+        for y in range(length):
+            row = []
+            for x in range(length):
+                cell = _Cell(master = master,
+                             height = cell_length,
+                             width = cell_length * 2,
+                             text = "",
+                             font = ("Verdana", font_size),
+                             padx = 0, pady = 0)
+
+                cell.def_coord(x, y)
+                cell.config(command = lambda x = cell.x, y = cell.y: on_click(x, y))
+
+                cell.grid(column = x + 1, row = y + 1)
+                row.append(cell)
+
+            self._cells.append(row)
+
+    def fill(self, x, y, player):
+        cell = self._cells[y][x]
+        cell.fill(player)
+        cell.config(text = player)
+        self._filled.append(cell)
+
+    def is_filled(self, x, y):
+        return self._cells[y][x].is_filled()
+
+    def clear(self):
+        for cell in self._filled:
+            cell.clear()
+        self._filled = []
+
+    def set_enabled(self, enabled):
+        if enabled == self._enabled:
+            return
+
+        self._enabled = enabled
+        for row in self._cells:
+            for cell in row:
+                cell.config(state = "active" if enabled else "disabled")
+
+#grid drawn on a single canvas: a rectangle for each cell, and a text item for each mark. a single click handler maps the coordinates of the click to the cell,
+#filling or clearing a cell only adds or deletes its own item, and disabling the grid only changes the cursor, so no other cell is drawn again
+class _CanvasBoard:
+    _board_pixels = 450
+    _min_cell_pixels = 28
+    _cell_color = "#f0f0f0"
+    _line_color = "#333333"
+
+    def __init__(self, master, length, on_click, font_size):
+        self._length = length
+        self._cell_pixels = max(_CanvasBoard._min_cell_pixels, _CanvasBoard._board_pixels // length)
+        self._on_click = on_click
+        self._font = ("Verdana", min(font_size, self._cell_pixels // 2))
+        self._marks = {}
+        self._enabled = True
+
+        size = self._cell_pixels * length
+        self._canvas = tk.Canvas(master, width = size, height = size, highlightthickness = 0, background = _CanvasBoard._line_color)
+        self._canvas.grid(column = 1, row = 1, columnspan = length, rowspan = length)
+
+        for y in range(length):
+            for x in range(length):
+                left = x * self._cell_pixels
+                top = y * self._cell_pixels
+                self._canvas.create_rectangle(left, top, left + self._cell_pixels, top + self._cell_pixels, fill = _CanvasBoard._cell_color, outline = _CanvasBoard._line_color)
+
+        self._canvas.bind("<Button-1>", self._click)
+
+    def _click(self, event):
+        x = event.x // self._cell_pixels
+        y = event.y // self._cell_pixels
+
+        if self._enabled and 0 <= x < self._length and 0 <= y < self._length:
+            self._on_click(x, y)
+
+    def fill(self, x, y, player):
+        if (x, y) not in self._marks:
+            center_x = (x + 0.5) * self._cell_pixels
+            center_y = (y + 0.5) * self._cell_pixels
+            self._marks[(x, y)] = self._canvas.create_text(center_x, center_y, text = player, font = self._font, tags = ("mark",))
+
+    def is_filled(self, x, y):
+        return (x, y) in self._marks
+
+    def clear(self):
+        if self._marks:
+            self._canvas.delete("mark")
+            self._marks.clear()
+
+    def set_enabled(self, enabled):
+        if enabled != self._enabled:
+            self._enabled = enabled
+            self._canvas.config(cursor = "" if enabled else "watch")
+
+_renderers = ("buttons", "canvas")
 
 #application class. create a window / root and its widgets and computer entity using minimax algorithm to form a Tic Tac Toe game interface
 class TicTacToe:
 
     _background_color = "#666666"
 
+    #default grid, overridden per instance by grid_length
     _grid_length_in_cell = 3
     _cell_length = 2
 
+    #milliseconds between two checks of the search worker, short enough that a decision read from the solution table shows without a visible delay
+    _poll_interval = 15
+
+    #checks of the search worker between two steps of the thinking indicator, about 100 ms
+    _indicator_polls = 7
+
+    #milliseconds between two moves of a replayed game
+    _replay_interval = 700
+
+    #redraw times kept for the average shown with the statistics
+    _redraw_samples = 100
+
     #during initialization: initializing inst. vars -> creating widgets -> run the app -> user press buttons, invoking methods to modify the tic tac toe game
-    def __init__(self, autoplay = False):
+    #search_mode and move_ordering: see Engine. grid_length x grid_length grid where win_length straight cells win.
+    #grids other than 3x3 with 3 to win use the depth-limited search, bounded by time_budget seconds per move. show_stats: showing the statistics of the computer's last search under the grid
+    #difficulty_mode: see Engine, "budget" makes the difficulty bound the thinking time of the computer instead of its random moves
+    #log_path: game log every finished game is appended to. replay: GameRecord of the log shown move by move once the window opens. tie_break: see Engine
+    #renderer: one of _renderers, the buttons on the classic grid and the canvas on bigger ones by default
+    def __init__(self, autoplay = False, search_mode = "alpha-beta", move_ordering = "history", grid_length = 3, win_length = 3, time_budget = 1.0, show_stats = False, difficulty_mode = "random",
+                 log_path = None, replay = None, tie_break = None, renderer = None):
+        #the engine keeps the game state and plays the computer's moves. it lives as long as the window, so its caches are reused by every game
+        self._engine = Engine(grid_length, win_length, search_mode, move_ordering, difficulty_mode = difficulty_mode, tie_break = tie_break)
+        self._grid_length_in_cell = grid_length
+        self._time_budget = time_budget
+        self._show_stats = show_stats
+        self._renderer = renderer or ("buttons" if grid_length <= TicTacToe._grid_length_in_cell else "canvas")
+
+        #seconds each of the last moves took to redraw the grid
+        self._redraw_seconds = []
+
+        #(first player, first agent, difficulty) of the running game, read when it starts so that the log holds the settings it began with
+        self._game_log = GameLog(log_path, grid_length, win_length) if log_path is not None else None
+        self._game_settings = None
+
         self._master = tk.Tk()
         self._run_game = False
         self._winner = None
-        self._state = [[None, None, None],
-                        [None, None, None],
-                        [None, None, None]]
+
+        #the computer searches on a worker thread, posting its decisions to the queue. the lock keeps a single worker using the engine's caches at a time,
+        #the cancel event of the running search is kept while the computer is thinking, and the game counter tells decisions of a restarted game apart
+        self._decisions = queue.Queue()
+        self._search_lock = threading.Lock()
+        self._pending_search = None
+        self._game_count = 0
         
         self._configure_master()
 
@@ -73,12 +223,16 @@ class TicTacToe:
         if autoplay:
             #start the game if autoplay mode
             self._initialize_game()
+        elif replay is not None:
+            self._master.after(TicTacToe._replay_interval, self._start_replay, replay)
         
         self._run_app()
 
     #modifying master for visual appealance purpose
     def _configure_master(self):
-        self._master.geometry("510x480")
+        #bigger grids let the window fit its content
+        if self._grid_length_in_cell == TicTacToe._grid_length_in_cell:
+            self._master.geometry("510x480")
         self._master.title("Tic Tac Toe")
         self._master.configure(background = TicTacToe._background_color)
 
@@ -88,7 +242,7 @@ class TicTacToe:
         self._controller_frame = tk.Frame(self._master, 
                                           width = 180,
                                           background = TicTacToe._background_color)
-        self._controller_frame.grid(column = 0, row = 1, rowspan = 3, sticky = "ns", padx = 15)
+        self._controller_frame.grid(column = 0, row = 1, rowspan = self._grid_length_in_cell, sticky = "ns", padx = 15)
 
         #allowing user to choose their player representation, which are X or O
         self._choose_player_repr_label = tk.Label(self._controller_frame, 
@@ -159,27 +313,17 @@ class TicTacToe:
                                     activebackground = TicTacToe._background_color)
             option.grid(column = 0, row = index + 9)
 
-    #initializing grid widget, consisting of 9 clickable cells (subclass of button). clicking cell == choosing which X or O to put at
+    #initializing grid widget, consisting of 9 clickable cells (buttons, or cells of a canvas). clicking cell == choosing which X or O to put at
     def _create_grid(self):
 
-        self._grid = []
-        for y in range(self._grid_length_in_cell):
-            row = []
-            for x in range(self._grid_length_in_cell):
-                cell = _Cell(master = self._master,
-                             height = self._cell_length,
-                             width = self._cell_length * 2,
-                             text = "",
-                             font = ("Verdana", 25),
-                             padx = 0, pady = 0)
-                
-                cell.def_coord(x, y)
-                cell.config(command = lambda x = cell.x, y = cell.y: self._move(x, y))
-            
-                cell.grid(column = x + 1, row = y + 1)
-                row.append(cell)
+        #the cells shrink as the grid grows, so that the window stays on the screen
+        cell_length = self._cell_length if self._grid_length_in_cell <= TicTacToe._grid_length_in_cell else 1
+        font_size = max(10, 25 * TicTacToe._grid_length_in_cell // self._grid_length_in_cell)
 
-            self._grid.append(row)
+        if self._renderer == "canvas":
+            self._board = _CanvasBoard(self._master, self._grid_length_in_cell, self._move, font_size)
+        else:
+            self._board = _ButtonBoard(self._master, self._grid_length_in_cell, self._move, cell_length, font_size)
     
     #additional widgets such as the game title and play / restart button
     def _create_additional_widgets(self):
@@ -189,21 +333,35 @@ class TicTacToe:
                                          pady = 20, 
                                          background = TicTacToe._background_color)
         
-        self._label_indicator.grid(column = 1, columnspan = 3, row = 0)
+        self._label_indicator.grid(column = 1, columnspan = self._grid_length_in_cell, row = 0)
         self._play_button = tk.Button(self._master, text = "Play", height = 3, width = 10, command = self._initialize_game)
-        self._play_button.grid(column = 2, row = 4)
+        self._play_button.grid(column = 1, columnspan = self._grid_length_in_cell, row = self._grid_length_in_cell + 1)
+
+        #overlay with the statistics of the last search, only collected when asked for
+        if self._show_stats:
+            self._stats_string = tk.StringVar(self._master, "")
+            self._stats_label = tk.Label(self._master,
+                                         textvariable = self._stats_string,
+                                         font = ("Courier", 9),
+                                         justify = "left",
+                                         background = TicTacToe._background_color)
+            self._stats_label.grid(column = 0, columnspan = self._grid_length_in_cell + 1, row = self._grid_length_in_cell + 2, sticky = "w", padx = 15)
     
     def _run_app(self):
         self._master.mainloop()
+        self._cancel_search()
+        self._engine.close()
 
     #will be run whenever play / restart button is clicked. effectively restarting all the game state to initial value     
     #invoked when autoplay mode is on or play / restart button is clicked 
     def _initialize_game(self):
+        self._cancel_search()
+        self._game_count += 1
+
         self._run_game = True
         self._winner = None
         self._label_string.set("Tic Tac Toe Game")
         self._clear_grid()
-        self._clear_state()
         self._enable_grid()
 
         self._play_button.config(text = "Restart")
@@ -211,31 +369,26 @@ class TicTacToe:
         human_repr = self._chosen_player_repr.get()
         computer_repr = "X" if human_repr == "O" else "O"
 
+        first_player = computer_repr if self._first_agent.get() == "Computer" else human_repr
+        self._game_settings = (first_player, self._first_agent.get(), self._difficulty.get())
+        self._engine.new_game(first_player)
+
         if self._first_agent.get() == "Computer":
-            self._initial_repr = computer_repr
             self._move_computer()
-        else:
-            self._initial_repr = human_repr
     
-    #method invoked when the player makes a move (pressing the cell). modifying the button that is being clicked and the 2D list (game state)
+    #method invoked when the player makes a move (pressing the cell). modifying the button that is being clicked and the game state
     def _move(self, x, y):
-        cell = self._grid[y][x]
-
-        #the method is only effective when the cell hasn't already been occupied
-        if not cell.is_filled() and self._run_game:
-            player = TicTacToe._player(self._state, self._initial_repr)
-            cell.fill(player)
-            cell.config(text = player)
+        #the method is only effective when the cell hasn't already been occupied and the computer isn't thinking
+        if not self._board.is_filled(x, y) and self._run_game and self._pending_search is None:
+            redraw_start = time.perf_counter()
+            player = self._engine.player()
+            self._board.fill(x, y, player)
 
-            self._state[y][x] = player 
-
-            post_game_state = TicTacToe._check_terminal_state(self._state)
-            is_terminal_state = post_game_state[0]
-            score = post_game_state[1]
+            self._engine.apply(x, y)
 
             #if the resulting state is the terminal state, declare the winner
-            if is_terminal_state:
-                self._winner = TicTacToe._get_winner(score)
+            if self._engine.is_terminal():
+                self._winner = self._engine.winner()
 
                 if self._winner == "Draw":
                     self._label_string.set(self._winner)
@@ -244,10 +397,16 @@ class TicTacToe:
 
                 self._run_game = False
                 self._disable_grid()
+                self._record_game()
 
-            #if the game is still continuable, it's time for the computer to take move
+            #if the game is still continuable, it's time for the computer to take move. the grid is measured before the search starts competing with the drawing
             else:
+                self._disable_grid()
+                self._measure_redraw(redraw_start)
                 self._move_computer()
+                return
+
+            self._measure_redraw(redraw_start)
 
     #invoked when computer makes a move, which happens during the game initialization when the computer is set to take the first turn or after the human's move
     def _move_computer(self):
@@ -256,50 +415,83 @@ class TicTacToe:
             #computer probably takes some time to make move, thus the grid is temporarily disabled to prevent user from making move 
             self._disable_grid()
 
-            #getting turn, calculating the amount of x and o in the grid. output: X or O
-            player = TicTacToe._player(self._state, self._initial_repr)
+            #the game difficulty determines how often the computer uses the minimax algorithm (the rest of the time it plays a random move), see Engine.best_move
+            #the search runs on a worker thread, the move is made by _poll_search once the decision arrives
+            self._start_search(self._difficulty.get())
+
+    #starting the search on a worker thread. the engine searches on a copy of its state, so that the grid can still be redrawn meanwhile
+    def _start_search(self, difficulty):
+        cancel = threading.Event()
+        self._pending_search = cancel
+        self._thinking_ticks = 0
+
+        worker = threading.Thread(target = self._search_worker,
+                                  args = (difficulty, cancel, self._game_count),
+                                  daemon = True)
+        worker.start()
+
+        self._master.after(TicTacToe._poll_interval, self._poll_search, cancel)
+
+    def _search_worker(self, difficulty, cancel, game_count):
+        with self._search_lock:
+            if cancel.is_set():
+                return
+
+            stats = SearchStats() if self._show_stats else None
+            action = self._engine.best_move(difficulty, self._time_budget, cancel, stats)
+
+        self._decisions.put((game_count, action, stats))
+
+    #invoked periodically on the Tk thread while the computer is thinking: makes the move once the decision arrives, otherwise animates the indicator
+    def _poll_search(self, cancel):
+        #the search has been cancelled since this check was scheduled
+        if self._pending_search is not cancel:
+            return
+
+        try:
+            game_count, action, stats = self._decisions.get_nowait()
+        except queue.Empty:
+            self._thinking_ticks += 1
+            if self._thinking_ticks % TicTacToe._indicator_polls == 0:
+                self._label_string.set("Thinking" + "." * (self._thinking_ticks // TicTacToe._indicator_polls % 4))
+            self._master.after(TicTacToe._poll_interval, self._poll_search, cancel)
+            return
+
+        #decisions of a game that has been restarted in the meantime are dropped
+        if game_count != self._game_count:
+            self._master.after(TicTacToe._poll_interval, self._poll_search, cancel)
+            return
+
+        self._pending_search = None
+        self._label_string.set("Tic Tac Toe Game")
 
-            difficulty = self._difficulty.get()
+        self._place_computer_move(action)
 
-            #getting the game difficulty that determines the threshold that decides how often does the computer use minimax algorithm
-            if difficulty == "Normal":
-                threshold = 0.2
-            elif difficulty == "Hard":
-                threshold = 0.05
-            else:
-                threshold = 0
-            
-            random_determinator = random.randint(0, 100)
-            normalized_random_determinator = random_determinator / 100
-
-            if normalized_random_determinator >= threshold:
-                #minimax algorithm. translating the concept of winning into 1, 0, and -1. conventially, X win refers to 1, O win refers to -1, and draw refers to 0
-                #the decision of algorithm depends on which player does the computer use. if the computer's objective is to gain score 1 (player X), it will use max alg. & vica versa
-                if player == "X":
-                    decision = TicTacToe._max_value(self._state, self._initial_repr)
-                else:
-                    decision = TicTacToe._min_value(self._state, self._initial_repr)
+        if stats is not None:
+            self._stats_string.set(f"{stats}\n{self._redraw_summary()}")
 
-                action = decision[1]
-            else:
-                action = random.choice(TicTacToe._get_actions(self._state))
+    #stopping the search the computer is running, if any. a depth-limited search stops right away, an exhaustive one finishes but its decision is dropped
+    def _cancel_search(self):
+        if self._pending_search is not None:
+            self._pending_search.set()
+            self._pending_search = None
+
+    #modifying the grid and the state with the move the computer decided on, then checking whether the game has ended
+    def _place_computer_move(self, action):
+        if self._run_game:
+            redraw_start = time.perf_counter()
+            player = self._engine.player()
 
             #modiying cells as a visual indicator that the cell has been populated with X or O
-            cell = self._grid[action.y][action.x]
-            cell.fill(player)
-            cell.config(text = player)
+            self._board.fill(action.x, action.y, player)
 
-            self._state[action.y][action.x] = player
+            self._engine.apply(action.x, action.y)
 
             self._enable_grid()
 
-            post_game_state = TicTacToe._check_terminal_state(self._state)
-            is_terminal_state = post_game_state[0]
-            score = post_game_state[1]
-
             #if the resulting state is the terminal state: declare the winner
-            if is_terminal_state:
-                self._winner = TicTacToe._get_winner(score)
+            if self._engine.is_terminal():
+                self._winner = self._engine.winner()
 
                 if self._winner == "Draw":
                     self._label_string.set(self._winner)
@@ -308,200 +500,150 @@ class TicTacToe:
 
                 self._run_game = False
                 self._disable_grid()
-            
-    def _enable_grid(self):
-        for row in self._grid:
-            for cell in row:
-                cell.config(state = "active")
+                self._record_game()
 
-    def _disable_grid(self):
-        for row in self._grid:
-            for cell in row:
-                cell.config(state = "disabled")
+            self._measure_redraw(redraw_start)
 
-    def _clear_grid(self):
-        for row in self._grid:
-            for cell in row:
-                cell.clear()
+    #time the grid took to show the move started at start (perf_counter seconds), drawing included
+    def _measure_redraw(self, start):
+        self._master.update_idletasks()
+        self._redraw_seconds.append(time.perf_counter() - start)
+        del self._redraw_seconds[:-TicTacToe._redraw_samples]
 
-    def _clear_state(self):
-        for y in range(len(self._state)):
-            for x in range(len(self._state[0])):
-                self._state[y][x] = None
-            
-    #checking whether the current state is a terminal state (where the game ends with or without winner)
-    def _check_terminal_state(state):
-        score = None
-
-        #checking horizontally the consecutive 3 Xs or Os
-        for row in state:
-            xs = row.count("X")
-            os = row.count("O")
-            if xs == 3:
-                return (True, 1)
-            elif os == 3:
-                return (True, -1)
-                
-        #checking vertically
-        for x in range(len(state[0])):
-            if state[0][x] != None and state[0][x] == state[1][x] == state[2][x]:
-                score = 1 if state[0][x] == "X" else -1
-                return (True, score)
-            
-        #checking diagonally 
-        if state[0][0] != None and state[0][0] == state[1][1] == state[2][2]:
-            score = 1 if state[0][0] == "X" else -1
-            return (True, score)
-        
-        if state[2][0] != None and state[2][0] == state[1][1] == state[0][2]:
-            score =  1 if state[2][0] == "X" else -1
-            return (True, score)
-
-        #check whether the game has ended by circumstance where all cells have been filled
-        for rows in state:
-            for cell in rows:
-                if cell == None:
-                    #if one of the cell hasn't yet been filled, it is implied that the game hasn't yet ended (since at this point, consecutive 3 Xs or Os conditions aren't met) 
-                    return (False, score)
-        score = 0
-
-        return (True, score)
-    
-    '''
-    Minimax algorithm documentation
-
-    Initially, the computer will find all the possible actions / moves to choose. 
-    The potential actions / moves then are applied to the clone of state (copy of 2D list), resulting in the new state.
-    How does the computer know whether an action / move is the best move? The computer will put itself on the opponent's shoes.
-    Assuming that the computer player is X. It will implement max_value method and put itself on the opponent perspective to evaluate each projected / new state.
-    The evaluation of each new state is done by implementing the opposite logic: min_value method, since the opponent has opposite objective to the computer.
-    This process will be done recursively until it hits the base case where the min_value or max_value methods return the terminal state score (when the game hits terminal state).
-    The value get from base case then will be pased all the way up to the original method (the first method to be called) and this method will return the best score with its action.
-    With best action known, the computer use that action to make the move.
-    '''
-
-    #additionally passing initial_repr. meaning: which player makes the turn (X or O) to be passed on the player method
-    def _max_value(state, initial_repr):
-
-        game_state = TicTacToe._check_terminal_state(state)
-        
-        is_terminal_state = game_state[0]
+    def _redraw_summary(self):
+        if not self._redraw_seconds:
+            return "redraw -"
 
-        score = game_state[1]
+        mean = sum(self._redraw_seconds) / len(self._redraw_seconds)
+        return f"redraw {self._redraw_seconds[-1] * 1000:.2f} ms, mean {mean * 1000:.2f} ms over {len(self._redraw_seconds)} moves ({self._renderer})"
 
-        #base case where the state is the terminal state. plainly returns the score (1, 0, or -1)
-        if is_terminal_state:
-            return (score, None)
-        
-        player = TicTacToe._player(state, initial_repr)
-        
-        possible_actions = TicTacToe._get_actions(state)
-
-        #minus infinity to ensure that the algorithm runs nevertheless how little is the value of an action
-        max_value = float("-inf")
-        chosen_action = None
-
-        for action in possible_actions:
-            projected_state = TicTacToe._deep_copy(state)
-
-            #modify state: projected state for each action
-            projected_state[action.y][action.x] = player
-
-            #putting the agent on the opponent shoes, reversing the algorithm until it hits base case
-            action_value = TicTacToe._min_value(projected_state, initial_repr)[0]
+    #appending the game that just ended to the game log, if there is one
+    def _record_game(self):
+        if self._game_log is not None:
+            first_player, first_agent, difficulty = self._game_settings
+            self._game_log.append(first_player, first_agent, difficulty, self._winner, self._engine.moves)
 
-            #choosing the best action among all possible actions 
-            if action_value > max_value:
-                max_value = action_value
-                chosen_action = action
-
-        #returning max value and chosen action. max value is necessary for recursion, while chosen action is necessary to know which action is the best
-        return (max_value, chosen_action)
+    #showing a game of a log on the grid, one move every _replay_interval milliseconds. the play button stops the replay and starts a game
+    def _start_replay(self, record):
+        self._cancel_search()
+        self._game_count += 1
+        self._run_game = False
+        self._clear_grid()
+        self._disable_grid()
+        self._label_string.set("Replay")
 
-    #same general principle, exactly opposite logic
-    def _min_value(state, initial_repr):
-        game_state = TicTacToe._check_terminal_state(state)
-        is_terminal_state = game_state[0]
-        score = game_state[1]
+        self._engine.new_game(record.first_player)
+        self._master.after(TicTacToe._replay_interval, self._replay_move, record, 0, self._game_count)
 
-        if is_terminal_state:
-            return (score, None)
+    def _replay_move(self, record, turn, game_count):
+        #a game has been started since the replay began
+        if game_count != self._game_count:
+            return
 
-        player = TicTacToe._player(state, initial_repr)
-        
-        possible_actions = TicTacToe._get_actions(state)
+        if turn == len(record.moves):
+            self._winner = record.winner
+            self._label_string.set(self._winner if self._winner == "Draw" else f"{self._winner} Wins")
+            return
 
-        min_value = float("inf")
-        chosen_action = None
+        length = self._grid_length_in_cell
+        x, y = record.moves[turn] % length, record.moves[turn] // length
 
-        for action in possible_actions:
-            projected_state = TicTacToe._deep_copy(state)
-            #modify state: projected state for each action
-            projected_state[action.y][action.x] = player
+        self._board.fill(x, y, self._engine.player())
+        self._engine.apply(x, y)
 
-            #putting the agent on the opponent shoes, reversing the algorithm
-            action_value = TicTacToe._max_value(projected_state, initial_repr)[0]
+        self._master.after(TicTacToe._replay_interval, self._replay_move, record, turn + 1, game_count)
 
-            if action_value < min_value:
-                min_value = action_value
-                chosen_action = action
-                
-        return (min_value, chosen_action)
-    
-    #determining which turn it is based on the current game state and who goes first
-    def _player(state, initial_value):
+    def _enable_grid(self):
+        self._board.set_enabled(True)
 
-        #calculating the amount of x and o. if one is bigger than the other, put the other as the current turn
-        x = sum(row.count("X") for row in state)
-        o = sum(row.count("O") for row in state)
+    def _disable_grid(self):
+        self._board.set_enabled(False)
 
-        if x < o:
-            return "X"
-        elif x > o:
-            return "O"
-        
-        #case where the number of Xs and Os are the same: the turn belongs to the one who took the initial turn
+    def _clear_grid(self):
+        self._board.clear()
+
+    #hit and miss counters of the transposition table, accumulated since the application started
+    def get_cache_stats(self):
+        return self._engine.get_cache_stats()
+
+#redraw time per move of each renderer on a grid_length grid (needs a display): random games are shown move by move, each move filling a cell
+#then disabling and enabling the grid like a move of the game does, the time including the drawing itself. returns {renderer: (mean, max) seconds}
+def measure_redraw(grid_length = 15, games = 3, seed = 0):
+    generator = random.Random(seed)
+    results = {}
+
+    for renderer in _renderers:
+        master = tk.Tk()
+        font_size = max(10, 25 * TicTacToe._grid_length_in_cell // grid_length)
+        if renderer == "canvas":
+            board = _CanvasBoard(master, grid_length, lambda x, y: None, font_size)
         else:
-            return initial_value
+            board = _ButtonBoard(master, grid_length, lambda x, y: None, 1 if grid_length > TicTacToe._grid_length_in_cell else TicTacToe._cell_length, font_size)
+        master.update()
 
-    #getting all the possible actions / moves in given state
-    def _get_actions(state):
-        actions = []
+        seconds = []
+        for _ in range(games):
+            board.clear()
+            cells = [(x, y) for y in range(grid_length) for x in range(grid_length)]
+            generator.shuffle(cells)
 
-        for y in range(len(state)):
-            for x in range(len(state[0])):
-                if state[y][x] == None:
-                    actions.append(_Action(x, y))
+            for turn, (x, y) in enumerate(cells):
+                start = time.perf_counter()
+                board.fill(x, y, "XO"[turn % 2])
+                board.set_enabled(False)
+                board.set_enabled(True)
+                master.update_idletasks()
+                seconds.append(time.perf_counter() - start)
 
-        return actions
-    
-    #converting score to qualitative value: name of the winner player
-    def _get_winner(score):
-        if score == 1:
-            return "X"
-        elif score == -1:
-            return "O"
-        elif score == 0:
-            return "Draw"
-        else:
-            return None
-    
-    #defining deep copy method to clone the state so that when projecting potential moves to the state in the minimax algorithm, the original state 2D list won't be modified 
-    def _deep_copy(state):
-        state_copy = []
-
-        for row in state:
-            row_copy = []
+        master.destroy()
+        results[renderer] = (sum(seconds) / len(seconds), max(seconds))
 
-            for value in row:
-                row_copy.append(value)
-
-            state_copy.append(row_copy)
-        
-        return state_copy
+    return results
 
 def main():
-    TicTacToe()
+    parser = argparse.ArgumentParser(description = "Tic Tac Toe against a minimax computer")
+    parser.add_argument("--grid-length", type = int, default = TicTacToe._grid_length_in_cell, help = "amount of cells on each side of the grid")
+    parser.add_argument("--win-length", type = int, default = None, help = "amount of straight cells to win, the grid length by default")
+    parser.add_argument("--time-budget", type = float, default = 1.0, help = "seconds the computer may think per move on grids other than 3x3")
+    parser.add_argument("--show-stats", action = "store_true", help = "show the statistics of the computer's last search under the grid")
+    parser.add_argument("--search-mode", default = "alpha-beta", choices = list(Engine._search_modes), help = "see Engine")
+    parser.add_argument("--difficulty-mode", default = "random", choices = ["random", "budget"], help = "random moves or bounded thinking time for the lower difficulties")
+    parser.add_argument("--renderer", default = None, choices = list(_renderers), help = "buttons or a single canvas, buttons on the 3x3 grid and canvas on bigger ones by default")
+    parser.add_argument("--measure-redraw", action = "store_true", help = "print the redraw time per move of each renderer on the grid, then exit")
+    parser.add_argument("--tie-break", default = None, choices = list(Engine._tie_breaks), help = "preferred action among equally good ones, natural on 3x3 and center on bigger grids by default")
+    parser.add_argument("--log", default = None, help = "game log every finished game is appended to, created if needed")
+    parser.add_argument("--replay", default = None, help = "game log to replay a game of, on the grid of the log")
+    parser.add_argument("--game", type = int, default = 0, help = "number of the game to replay, 0 being the first one of the log")
+    args = parser.parse_args()
+
+    if args.measure_redraw:
+        for renderer, (mean, maximum) in measure_redraw(args.grid_length).items():
+            print(f"{renderer:<10} mean {mean * 1000:.2f} ms, max {maximum * 1000:.2f} ms per move on {args.grid_length}x{args.grid_length}")
+        return
+
+    grid_length = args.grid_length
+    win_length = args.grid_length if args.win_length is None else args.win_length
+    replay = None
+
+    if args.replay is not None:
+        try:
+            replay_log = GameLog.load(args.replay)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+
+        replay = replay_log.game_number(args.game)
+        if replay is None:
+            parser.error(f"{args.replay} has no game {args.game}")
+        grid_length, win_length = replay_log.rules.length, replay_log.rules.win_length
+
+    if not 1 <= win_length <= grid_length:
+        parser.error(f"--win-length must be between 1 and {grid_length}")
+
+    try:
+        TicTacToe(search_mode = args.search_mode, grid_length = grid_length, win_length = win_length, time_budget = args.time_budget, show_stats = args.show_stats, difficulty_mode = args.difficulty_mode,
+                  log_path = args.log, replay = replay, tie_break = args.tie_break, renderer = args.renderer)
+    except ValueError as error:
+        parser.error(str(error))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,283 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from engine import Engine, _move_orderings
+
+'''
+Tournament Overview
+
+Headless self-play: agent configurations (difficulty, search mode, move ordering) play each other without the GUI, to measure how strong each configuration is.
+Every ordered pair of agents plays the given amount of games (the first agent as X, the second as O), X and O taking the first turn alternately.
+
+The games are split into chunks of consecutive games, and the chunks are played on a pool of processes.
+Each chunk creates its own engines, seeded from the tournament seed, the chunk index, and the agent, so the same seed replays the same games
+no matter how many processes run them or in which order the chunks finish.
+
+Every game is written to the JSONL output as soon as its chunk finishes, and only the counters are kept in memory:
+wins / draws / losses for each pair of agents, and a histogram of the time each agent took per move, from which the latency percentiles are read.
+
+Usage:
+    python tournament.py --games 1000 --agents Normal Hard Impossible --output results.jsonl
+
+An agent is written DIFFICULTY[:SEARCH_MODE[:MOVE_ORDERING]], e.g. Impossible:minimax or Hard:alpha-beta:positional.
+
+'''
+
+#histogram of durations with logarithmic buckets (8 per doubling, from 0.1 microsecond), so that percentiles of millions of moves fit in a few hundred counters
+class _LatencyHistogram:
+    _buckets_per_octave = 8
+    _resolution = 1e-7
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        bucket = max(0, int(math.log2(max(seconds, _LatencyHistogram._resolution) / _LatencyHistogram._resolution) * _LatencyHistogram._buckets_per_octave))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.maximum = max(self.maximum, seconds)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    #upper bound of the bucket holding the given fraction of the durations, at most 9% above the actual percentile
+    def percentile(self, fraction):
+        if self.total == 0:
+            return 0.0
+
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= fraction * self.total:
+                return min(self.maximum, _LatencyHistogram._resolution * 2 ** ((bucket + 1) / _LatencyHistogram._buckets_per_octave))
+
+        return self.maximum
+
+#one agent configuration, parsed from DIFFICULTY[:SEARCH_MODE[:MOVE_ORDERING]]
+class _Agent:
+    def __init__(self, spec):
+        parts = spec.split(":")
+
+        if not 1 <= len(parts) <= 3 or parts[0] not in Engine._random_move_chances:
+            raise ValueError(f"invalid agent {spec!r}, expected DIFFICULTY[:SEARCH_MODE[:MOVE_ORDERING]] with DIFFICULTY one of {', '.join(Engine._random_move_chances)}")
+
+        self.name = spec
+        self.difficulty = parts[0]
+        self.search_mode = parts[1] if len(parts) > 1 else "alpha-beta"
+        self.move_ordering = parts[2] if len(parts) > 2 else "history"
+
+        if self.search_mode not in Engine._search_modes:
+            raise ValueError(f"invalid agent {spec!r}, SEARCH_MODE must be one of {', '.join(Engine._search_modes)}")
+
+        if self.move_ordering not in _move_orderings:
+            raise ValueError(f"invalid agent {spec!r}, MOVE_ORDERING must be one of {', '.join(_move_orderings)}")
+
+    #workers: processes of the pool of a parallel search mode. use_solution_table: see Engine
+    def create_engine(self, grid_length, win_length, seed, difficulty_mode, workers = None, use_solution_table = True):
+        return Engine(grid_length, win_length, self.search_mode, self.move_ordering, seed, use_solution_table, workers, difficulty_mode)
+
+#game number index of the tournament: which pair of agents plays it, and who takes the first turn
+def _game_setup(index, pairs, games_per_pair):
+    x_agent, o_agent = pairs[index // games_per_pair]
+    first_player = "X" if index % 2 == 0 else "O"
+    return (x_agent, o_agent, first_player)
+
+#played in the worker processes: every game of one chunk, with engines created for the chunk only
+#returns the records of the games and the latency histogram of each agent
+def _play_chunk(task):
+    chunk_index, first_game, last_game, specs, pairs, games_per_pair, grid_length, win_length, time_budget, seed, difficulty_mode, engine_workers, use_solution_table = task
+    agents = {spec: _Agent(spec) for spec in specs}
+    histograms = {spec: _LatencyHistogram() for spec in specs}
+    engines = {}
+    records = []
+
+    for index in range(first_game, last_game):
+        x_spec, o_spec, first_player = _game_setup(index, pairs, games_per_pair)
+
+        #each side has its own engine (an agent may play itself), which follows every move of the game
+        players = {}
+        for player, spec in (("X", x_spec), ("O", o_spec)):
+            key = (player, spec)
+            if key not in engines:
+                engines[key] = agents[spec].create_engine(grid_length, win_length, f"{seed}:{chunk_index}:{player}:{spec}", difficulty_mode, engine_workers, use_solution_table)
+            players[player] = engines[key]
+            players[player].new_game(first_player)
+
+        specs_of = {"X": x_spec, "O": o_spec}
+        referee = players["X"]
+        moves = []
+        move_seconds = []
+
+        while not referee.is_terminal():
+            player = referee.player()
+            agent = agents[specs_of[player]]
+
+            start = time.perf_counter()
+            action = players[player].best_move(agent.difficulty, time_budget)
+            elapsed = time.perf_counter() - start
+
+            histograms[agent.name].add(elapsed)
+            moves.append(action.y * grid_length + action.x)
+            move_seconds.append(round(elapsed, 6))
+
+            for engine in players.values():
+                engine.apply(action.x, action.y)
+
+        records.append({"game": index,
+                        "x": x_spec,
+                        "o": o_spec,
+                        "first": first_player,
+                        "winner": referee.winner(),
+                        "moves": moves,
+                        "move_seconds": move_seconds})
+
+    for engine in engines.values():
+        engine.close()
+
+    return (records, histograms)
+
+#playing the whole tournament, writing every game to output (a JSONL file, or None) and returning the summary
+#difficulty_mode, use_solution_table: see Engine, the same for every agent. without the solution table, the agents search the 3x3 grid too
+def run_tournament(specs, games_per_pair, output = None, workers = None, chunk_size = 100, seed = 0, grid_length = 3, win_length = 3, time_budget = 1.0, difficulty_mode = "random",
+                   use_solution_table = True):
+    for spec in specs:
+        _Agent(spec)
+
+    pairs = list(itertools.permutations(specs, 2)) if len(specs) > 1 else [(specs[0], specs[0])]
+    total_games = len(pairs) * games_per_pair
+    workers = workers or os.cpu_count() or 1
+
+    #pool size of the parallel agents: the cores of each worker, since a pool per core in every worker would start about cpu_count² processes
+    engine_workers = max(1, (os.cpu_count() or 1) // workers)
+
+    results = {pair: {"X": 0, "O": 0, "Draw": 0} for pair in pairs}
+    histograms = {spec: _LatencyHistogram() for spec in specs}
+
+    def tasks():
+        for chunk_index, first_game in enumerate(range(0, total_games, chunk_size)):
+            yield (chunk_index, first_game, min(first_game + chunk_size, total_games), specs, pairs, games_per_pair, grid_length, win_length, time_budget, seed, difficulty_mode, engine_workers, use_solution_table)
+
+    output_file = open(output, "w") if output is not None else None
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            pending = set()
+            task_iterator = tasks()
+
+            #keeping a bounded amount of chunks in flight, so that neither the tasks nor the results of a long tournament pile up in memory
+            for task in itertools.islice(task_iterator, workers * 2):
+                pending.add(executor.submit(_play_chunk, task))
+
+            while pending:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+
+                for future in done:
+                    records, chunk_histograms = future.result()
+
+                    for record in records:
+                        results[(record["x"], record["o"])][record["winner"]] += 1
+                        if output_file is not None:
+                            output_file.write(json.dumps(record) + "\n")
+
+                    for spec, histogram in chunk_histograms.items():
+                        histograms[spec].merge(histogram)
+
+                    next_task = next(task_iterator, None)
+                    if next_task is not None:
+                        pending.add(executor.submit(_play_chunk, next_task))
+
+                if output_file is not None:
+                    output_file.flush()
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+    return _summarize(specs, results, histograms, total_games, time.perf_counter() - start)
+
+#win / draw / loss rates of every agent (over all its games) and of every pair, plus the latency percentiles of every agent, in milliseconds
+def _summarize(specs, results, histograms, total_games, seconds):
+    agents = {}
+
+    for spec in specs:
+        wins = draws = losses = 0
+        for (x_spec, o_spec), counts in results.items():
+            if x_spec == spec:
+                wins += counts["X"]
+                losses += counts["O"]
+                draws += counts["Draw"]
+            if o_spec == spec:
+                wins += counts["O"]
+                losses += counts["X"]
+                draws += counts["Draw"]
+
+        games = max(1, wins + draws + losses)
+        histogram = histograms[spec]
+        agents[spec] = {"win_rate": wins / games,
+                        "draw_rate": draws / games,
+                        "loss_rate": losses / games,
+                        "moves": histogram.total,
+                        "p50_ms": histogram.percentile(0.5) * 1000,
+                        "p90_ms": histogram.percentile(0.9) * 1000,
+                        "p99_ms": histogram.percentile(0.99) * 1000,
+                        "max_ms": histogram.maximum * 1000}
+
+    pairs = [{"x": x_spec, "o": o_spec, **counts} for (x_spec, o_spec), counts in results.items()]
+
+    return {"games": total_games, "seconds": seconds, "agents": agents, "pairs": pairs}
+
+def _print_summary(summary):
+    print(f"{summary['games']} games in {summary['seconds']:.1f} seconds")
+    print(f"{'agent':<28}{'win':>8}{'draw':>8}{'loss':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for spec, agent in summary["agents"].items():
+        print(f"{spec:<28}{agent['win_rate']:>8.1%}{agent['draw_rate']:>8.1%}{agent['loss_rate']:>8.1%}"
+              f"{agent['p50_ms']:>10.3f}{agent['p90_ms']:>10.3f}{agent['p99_ms']:>10.3f}{agent['max_ms']:>10.3f}")
+
+    print()
+    print(f"{'X':<28}{'O':<28}{'X wins':>8}{'O wins':>8}{'draws':>8}")
+    for pair in summary["pairs"]:
+        print(f"{pair['x']:<28}{pair['o']:<28}{pair['X']:>8}{pair['O']:>8}{pair['Draw']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Self-play tournament between agent configurations")
+    parser.add_argument("--agents", nargs = "+", default = list(Engine._random_move_chances), help = "agents as DIFFICULTY[:SEARCH_MODE[:MOVE_ORDERING]]")
+    parser.add_argument("--games", type = int, default = 100, help = "games played by every ordered pair of agents")
+    parser.add_argument("--output", default = None, help = "JSONL file receiving every game")
+    parser.add_argument("--workers", type = int, default = None, help = "amount of processes, the amount of cores by default")
+    parser.add_argument("--chunk-size", type = int, default = 100, help = "games played by a process per task")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--grid-length", type = int, default = 3)
+    parser.add_argument("--win-length", type = int, default = None, help = "the grid length by default")
+    parser.add_argument("--time-budget", type = float, default = 1.0, help = "seconds per move on grids other than 3x3")
+    parser.add_argument("--difficulty-mode", default = "random", choices = ["random", "budget"], help = "how the difficulty weakens the agents, see Engine")
+    parser.add_argument("--no-solution-table", action = "store_true", help = "always search, even on 3x3 when the solution table exists")
+    parser.add_argument("--json", action = "store_true", help = "print the summary as JSON")
+    args = parser.parse_args()
+
+    win_length = args.grid_length if args.win_length is None else args.win_length
+
+    try:
+        summary = run_tournament(args.agents, args.games, args.output, args.workers, args.chunk_size, args.seed, args.grid_length, win_length, args.time_budget, args.difficulty_mode,
+                                 not args.no_solution_table)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.json:
+        json.dump(summary, sys.stdout, indent = 2)
+        print()
+    else:
+        _print_summary(summary)
+
+if __name__ == "__main__":
+    main()